@@ -0,0 +1,76 @@
+import argparse
+import importlib
+import os
+import time
+
+from benchmarks.harness import run_case, result_key, save_results, load_results, compare
+
+# -----------------------------
+# Benchmark Runner
+# -----------------------------
+# Runs the benchmark suites on the real game code and writes the results as JSON:
+#   python -m benchmarks                          # every suite
+#   python -m benchmarks render collision --quick # a fast smoke run of two suites
+#   python -m benchmarks --compare benchmarks/results/old.json
+# The db suite needs a local Postgres (docker compose up db); without one it is skipped.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Suite name -> module defining collect(quick)
+SUITES = {
+    "render": "benchmarks.bench_render",
+    "collision": "benchmarks.bench_collision",
+    "expressions": "benchmarks.bench_expressions",
+    "db": "benchmarks.bench_db",
+}
+
+
+def run_suite(name, quick=False):
+    """
+    Run every case of one suite, printing each result as it comes in.
+    """
+    module = importlib.import_module(SUITES[name])
+    results = []
+    for case in module.collect(quick):
+        result = run_case(name, case, quick)
+        print(f"{result_key(result):60} {result['ops_per_sec']:>12.1f} ops/s "
+              f"{result['median_us']:>11.2f} us  {result['peak_bytes']:>9} B peak")
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmark the game's hot paths and store the results as JSON.")
+    parser.add_argument("suites", nargs="*", help=f"suites to run (default: all of {', '.join(SUITES)})")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", metavar="OLD", help="compare with an earlier results file")
+    parser.add_argument("--quick", action="store_true", help="fewer, shorter runs and smaller inputs")
+    args = parser.parse_args(argv)
+
+    unknown = [suite for suite in args.suites if suite not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    results = []
+    skipped = {}
+    for name in args.suites or SUITES:
+        try:
+            results += run_suite(name, args.quick)
+        except Exception as e:
+            if name != "db":
+                raise
+            # No local database is a normal setup; note it in the results instead of failing
+            print(f"Skipping the db suite: {e}")
+            skipped[name] = str(e)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    save_results(output, results, skipped)
+    print(f"Wrote {len(results)} results to {output}")
+
+    if args.compare:
+        print("\n".join(compare(load_results(args.compare), load_results(output))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import itertools
+import random
+
+import pygame
+
+from logic.levelpack import open_level_registry
+from logic.levels import Level, DEFAULT_SPAWN, DEFAULT_EXIT
+from logic.rules import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_SIZE, LevelGeometry,
+    hits_wall, clamp_to_screen, push_out, apply_step,
+)
+from logic.simulation import simulate
+from benchmarks.harness import Case, SEED
+
+# -----------------------------
+# Collision Benchmarks
+# -----------------------------
+# The per-frame collision work of run_game (hits_wall, clamp_to_screen,
+# push_out, apply_step) on synthetic levels with 10 to 10,000 walls, plus
+# building a level's geometry and whole headless simulations of real levels.
+
+SUITE = "collision"
+WALL_COUNTS = (10, 100, 1000, 10000)
+SAMPLES = 512  # Player positions/steps cycled through by the per-frame cases
+
+SIMULATIONS = {
+    1: ["asc!y=x", "asc!y=0", "asc!y=x*3", "desc!y=-x"],
+    5: ["asc!y=x//2", "asc!y=x", "desc!y=x", "asc!y=-x//3"],
+}
+
+
+def synthetic_level(wall_count, rng):
+    """
+    A level with `wall_count` random walls, thin and short enough to leave gaps.
+    """
+    walls = []
+    for _ in range(wall_count):
+        if rng.random() < 0.5:
+            width, height = rng.randint(5, 40), rng.randint(40, 200)
+        else:
+            width, height = rng.randint(40, 200), rng.randint(5, 40)
+        walls.append((rng.randrange(0, SCREEN_WIDTH - width), rng.randrange(0, SCREEN_HEIGHT - height),
+                      width, height))
+    return Level(0, tuple(walls), DEFAULT_EXIT, DEFAULT_SPAWN)
+
+
+def collect(quick=False):
+    for wall_count in WALL_COUNTS[:2] if quick else WALL_COUNTS:
+        rng = random.Random(SEED + wall_count)
+        level = synthetic_level(wall_count, rng)
+        geometry = LevelGeometry(level, pygame.Rect)
+        positions = [(rng.randrange(0, SCREEN_WIDTH - PLAYER_SIZE), rng.randrange(0, SCREEN_HEIGHT - PLAYER_SIZE))
+                     for _ in range(SAMPLES)]
+        steps = [(rng.choice((-10, 10)), rng.uniform(-80, 80)) for _ in range(SAMPLES)]
+        player = pygame.Rect(0, 0, PLAYER_SIZE, PLAYER_SIZE)
+
+        def frame(geometry=geometry, positions=positions, steps=steps, player=player,
+                  next_sample=itertools.cycle(range(SAMPLES)).__next__):
+            # One frame of run_game's movement: static check, screen clamp, then a swept function step
+            i = next_sample()
+            player.topleft = positions[i]
+            if hits_wall(player, geometry) | clamp_to_screen(player):
+                push_out(player, geometry)
+            step_x, step_y = steps[i]
+            apply_step(player, step_x, step_y, geometry)
+
+        def build(level=level):
+            LevelGeometry(level, pygame.Rect)
+
+        yield Case("frame", {"walls": wall_count}, frame)
+        yield Case("build_geometry", {"walls": wall_count}, build)
+
+    levels = open_level_registry()
+    for number, inputs in SIMULATIONS.items():
+        def play(level=levels.get(number), inputs=inputs):
+            simulate(level, inputs)
+
+        yield Case("simulate", {"level": number, "inputs": len(inputs)}, play)
@@ -0,0 +1,130 @@
+import itertools
+import os
+import random
+
+from benchmarks.harness import Case, SEED
+
+# -----------------------------
+# Score / Leaderboard Query Benchmarks
+# -----------------------------
+# The queries the game and the leaderboard run, against a local Postgres such as
+# the docker-compose.yml one (`docker compose up db`). Everything happens in a
+# throwaway `benchmarks` schema filled with seeded users, dropped afterwards.
+# User, password and database name come from .env like the game's; host and port
+# are BENCH_POSTGRES_HOST/BENCH_POSTGRES_PORT, never the game's remote server.
+
+SUITE = "db"
+SCHEMA = "benchmarks"
+USER_COUNT = 100000
+QUICK_USER_COUNT = 10000
+MAX_SCORE = 10
+BATCH_SIZE = 100  # Scores per update_high_scores call, like a Storage sync of dirty scores
+
+
+def connect():
+    """
+    Pool on the local benchmark server, with the benchmark schema first on the search path.
+    """
+    from logic.db import Database
+
+    return Database(host=os.getenv("BENCH_POSTGRES_HOST", "localhost"),
+                    port=os.getenv("BENCH_POSTGRES_PORT", "5432"),
+                    options=f"-c search_path={SCHEMA}")
+
+
+def seed_users(db, count, rng):
+    from psycopg2.extras import execute_values
+    from logic.utils import create_tables
+
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cur.execute(f"CREATE SCHEMA {SCHEMA}")
+        conn.commit()
+    create_tables(db)
+    users = [(f"u{i:06d}", "x", rng.randint(0, MAX_SCORE)) for i in range(count)]
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            # Seeded scores date from before the run, so only the benchmark's own writes count as changes
+            execute_values(cur, "INSERT INTO users (username, password, high_score, updated_at) VALUES %s",
+                           users, template="(%s, %s, %s, now() - interval '1 day')", page_size=5000)
+            cur.execute("ANALYZE users")
+        conn.commit()
+    return users
+
+
+def drop_schema(db):
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+
+
+def collect(quick=False):
+    from logic.leaderboard_cache import LeaderboardCache, CACHED_ROWS
+    from logic.utils import (
+        get_user_high_score, update_user_high_score, update_high_scores,
+        get_leaderboard_page, get_user_rank,
+    )
+
+    count = QUICK_USER_COUNT if quick else USER_COUNT
+    rng = random.Random(SEED)
+    db = connect()
+    try:
+        users = seed_users(db, count, rng)
+        usernames = [username for username, _, _ in users]
+        picks = [rng.choice(usernames) for _ in range(1024)]
+        next_user = itertools.cycle(picks).__next__
+        # Updates only ever raise a score, so keep raising it to make every call a real write
+        next_score = itertools.count(MAX_SCORE + 1).__next__
+
+        middle = get_leaderboard_page(db, limit=count // 2)[-1]
+        deep_cursor = (middle[2], middle[1])  # Cursor halfway down the leaderboard
+
+        def first_page():
+            get_leaderboard_page(db)
+
+        def deep_page():
+            get_leaderboard_page(db, after=deep_cursor)
+
+        def rank():
+            get_user_rank(db, next_user())
+
+        def high_score():
+            get_user_high_score(db, next_user())
+
+        def update_one():
+            update_user_high_score(db, next_user(), next_score())
+
+        def update_batch():
+            score = next_score()
+            update_high_scores(db, [(next_user(), score) for _ in range(BATCH_SIZE)])
+
+        params = {"users": count}
+        yield Case("leaderboard_first_page", params, first_page)
+        yield Case("leaderboard_deep_page", params, deep_page)
+        yield Case("user_rank", params, rank)
+        yield Case("user_high_score", params, high_score)
+        yield Case("update_user_high_score", params, update_one)
+        yield Case("update_high_scores", dict(params, batch=BATCH_SIZE), update_batch)
+
+        def cache_load():
+            LeaderboardCache(db).refresh()
+
+        cache = LeaderboardCache(db)
+        cache.refresh()
+
+        def cache_refresh():
+            cache.refresh(force=True)
+
+        def cache_around():
+            cache.around(next_user())
+
+        yield Case("cache_load", dict(params, rows=CACHED_ROWS), cache_load)
+        yield Case("cache_incremental_refresh", params, cache_refresh)
+        yield Case("cache_around", params, cache_around)
+    finally:
+        try:
+            drop_schema(db)
+        finally:
+            db.close()
@@ -0,0 +1,56 @@
+import random
+
+from logic.expressions import (
+    normalize_text, parse_expression, build_function, compile_user_function, SAFE_GLOBALS,
+)
+from logic.trajectory import evaluate_curve, player_path
+from benchmarks.harness import Case, SEED
+
+# -----------------------------
+# User Function Benchmarks
+# -----------------------------
+# Parsing, validating and compiling what students type, with and without the
+# expression cache, and evaluating the compiled functions (scalar and NumPy).
+
+SUITE = "expressions"
+
+EXPRESSIONS = {
+    "linear": "asc!y=x",
+    "scaled": "desc!y=-x // 3",
+    "trig": "asc!y=math.sin(x) * 40 + cos(x / 2) * 10",
+    "nested": "asc!y=abs(pow(x, 2) - 3 * x) // (1 + math.sqrt(abs(x)))",
+}
+
+
+def collect(quick=False):
+    rng = random.Random(SEED)
+    xs = [rng.uniform(-100, 100) for _ in range(1000)]
+
+    for name, text in EXPRESSIONS.items():
+        expression = text.split("=", 1)[1]
+
+        def cold(expression=expression):
+            # What a cache miss costs: parse, whitelist check and compile
+            build_function(parse_expression(normalize_text(expression)), SAFE_GLOBALS)
+
+        def cached(text=text):
+            compile_user_function(text)
+
+        function = compile_user_function(text)[2]
+
+        def evaluate(function=function, xs=xs):
+            for x in xs:
+                function(x)
+
+        def evaluate_batch(expression=expression, xs=xs):
+            evaluate_curve(expression, xs)
+
+        yield Case("compile_cold", {"expression": name}, cold)
+        yield Case("compile_cached", {"expression": name}, cached)
+        yield Case("evaluate_scalar", {"expression": name, "points": len(xs)}, evaluate)
+        yield Case("evaluate_numpy", {"expression": name, "points": len(xs)}, evaluate_batch)
+
+    def path():
+        player_path("asc", "x // 2", (0, 570), 600)
+
+    yield Case("player_path", {"frames": 600}, path)
@@ -0,0 +1,87 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from logic.assetpack import AssetManager, DEFAULT_BUNDLE_PATH
+from logic.levelpack import open_level_registry
+from logic.render import TextureCache, TextRenderer, LevelRenderer, LevelTextures
+from logic.rules import SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_SIZE, LevelGeometry
+from benchmarks.harness import Case, SEED
+
+# -----------------------------
+# Rendering Benchmarks
+# -----------------------------
+# Both of run_game's redraw paths, through the same LevelRenderer.redraw() call
+# and real assets: the dirty-rectangle path and the full repaint. Runs under the
+# SDL dummy video driver, so it measures the blitting, not the display.
+
+SUITE = "render"
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+LEVEL_NUMBERS = (1, 10)
+LABEL_FONT_SIZE = 36  # main.LABEL_FONT_SIZE
+POSITIONS = 256  # Player positions cycled through, one per frame
+
+
+def decode_textures():
+    """
+    The textures as run_game loaded them before the asset bundle: decode every source image.
+    """
+    background = pygame.image.load(os.path.join(ASSETS_DIR, "background.jpg")).convert()
+    player = pygame.image.load(os.path.join(ASSETS_DIR, "player.png")).convert_alpha()
+    wall = pygame.image.load(os.path.join(ASSETS_DIR, "wall.png")).convert_alpha()
+    exit_texture = pygame.image.load(os.path.join(ASSETS_DIR, "exit.jpg")).convert_alpha()
+    return background, pygame.transform.scale(player, (PLAYER_SIZE, PLAYER_SIZE)), wall, exit_texture
+
+
+def bundle_textures(bundle_path=DEFAULT_BUNDLE_PATH):
+    """
+    The textures as run_game loads them: a fresh AssetManager mapping the bundle.
+    """
+    assets = AssetManager(bundle_path)
+    textures = tuple(assets.surface(name) for name in ("background", "player", "wall", "exit"))
+    assets.close()
+    return textures
+
+
+def collect(quick=False):
+    pygame.init()
+    try:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        background, player_texture, wall_texture, exit_texture = bundle_textures()  # Builds a stale bundle
+        textures = LevelTextures(background, wall_texture, exit_texture, player_texture)
+        yield Case("load_textures_decode", {}, decode_textures)
+        yield Case("load_textures_bundle", {}, bundle_textures)
+        levels = open_level_registry()
+        text_renderer = TextRenderer()
+        rng = random.Random(SEED)
+        positions = [pygame.Rect(rng.randrange(0, SCREEN_WIDTH - PLAYER_SIZE),
+                                 rng.randrange(0, SCREEN_HEIGHT - PLAYER_SIZE), PLAYER_SIZE, PLAYER_SIZE)
+                     for _ in range(POSITIONS)]
+
+        for number in LEVEL_NUMBERS:
+            geometry = LevelGeometry(levels.get(number), pygame.Rect)
+            label = text_renderer.render(f"Level: {number}", LABEL_FONT_SIZE)
+            texture_cache = TextureCache()
+            texture_cache.preload(wall_texture, [wall.size for wall in geometry.walls])
+            texture_cache.preload(exit_texture, [geometry.exit.size])
+            dirty_renderer = LevelRenderer(screen, texture_cache, textures)
+            full_renderer = LevelRenderer(screen, texture_cache, textures, dirty_rects=False)
+            frame = iter(range(1 << 62))
+
+            def bake(renderer=dirty_renderer, geometry=geometry, label=label):
+                renderer.bake(geometry, label)
+
+            def redraw(renderer, geometry=geometry, label=label, frame=frame):
+                renderer.redraw(geometry, label, positions[next(frame) % POSITIONS])
+
+            params = {"level": number, "walls": len(geometry.walls)}
+            yield Case("bake", params, bake)
+            dirty_renderer.redraw(geometry, label, positions[0])  # First frame bakes and repaints everything
+            yield Case("redraw_dirty", params, lambda renderer=dirty_renderer: redraw(renderer))
+            yield Case("redraw_full", params, lambda renderer=full_renderer: redraw(renderer))
+    finally:
+        pygame.quit()
@@ -0,0 +1,144 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+SEED = 1234          # Every suite seeds its random data with this, so runs are comparable
+MIN_TIME = 0.2       # Seconds one timed repeat should last at least
+REPEATS = 5          # Timed repeats per case; the median is reported
+QUICK_MIN_TIME = 0.02
+QUICK_REPEATS = 3
+
+# One benchmark: `fn` is called with no arguments, many times
+Case = namedtuple("Case", ["name", "params", "fn"])
+
+
+def _loop(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return time.perf_counter() - start
+
+
+def calibrate(fn, min_time):
+    """
+    Number of calls that takes at least `min_time` seconds.
+    """
+    calls = 1
+    while True:
+        elapsed = _loop(fn, calls)
+        if elapsed >= min_time:
+            return calls
+        # Aim a little past min_time, at most 10x more calls per step
+        calls = max(calls + 1, int(calls * min(10, 1.2 * min_time / max(elapsed, 1e-9))))
+
+
+def allocations(fn, calls=10):
+    """
+    Memory allocated by one call, measured with tracemalloc over `calls` calls:
+    the peak above the starting point and what stays allocated afterwards.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()  # Warm up caches so they are not counted as per-call allocations
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(calls):
+            fn()
+        end, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": peak - start, "retained_bytes_per_call": round((end - start) / calls, 1)}
+
+
+def run_case(suite, case, quick=False):
+    """
+    Time one Case and measure its allocations. Returns the result dict stored in the JSON file.
+    """
+    min_time, repeats = (QUICK_MIN_TIME, QUICK_REPEATS) if quick else (MIN_TIME, REPEATS)
+    calls = calibrate(case.fn, min_time)
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # Keep collections out of the timings; their cost shows in the allocations
+    try:
+        times = [_loop(case.fn, calls) / calls for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    median = statistics.median(times)
+    result = {
+        "suite": suite,
+        "name": case.name,
+        "params": case.params,
+        "calls_per_repeat": calls,
+        "repeats": repeats,
+        "ops_per_sec": round(1 / median, 1),
+        "median_us": round(median * 1e6, 3),
+        "min_us": round(min(times) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(times) * 1e6, 3) if len(times) > 1 else 0.0,
+    }
+    result.update(allocations(case.fn))
+    return result
+
+
+def result_key(result):
+    params = ",".join(f"{key}={value}" for key, value in sorted(result["params"].items()))
+    return f"{result['suite']}/{result['name']}[{params}]"
+
+
+def environment():
+    """
+    Where the results came from, stored next to them.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "seed": SEED,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def save_results(path, results, skipped):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results, "skipped": skipped}, f, indent=2)
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old, new):
+    """
+    Lines comparing two result files case by case: ops/sec ratio new/old (above 1 is faster).
+    """
+    old_results = {result_key(result): result for result in old["results"]}
+    lines = []
+    for result in new["results"]:
+        key = result_key(result)
+        before = old_results.get(key)
+        if before is None:
+            lines.append(f"{key}: new")
+            continue
+        ratio = result["ops_per_sec"] / before["ops_per_sec"]
+        lines.append(f"{key}: {before['ops_per_sec']:.1f} -> {result['ops_per_sec']:.1f} ops/s "
+                     f"({ratio:.2f}x){'  SLOWER' if ratio < 0.9 else ''}")
+    return lines
@@ -0,0 +1,310 @@
+import mmap
+import os
+import struct
+import sys
+
+# -----------------------------
+# Asset Bundle Format
+# -----------------------------
+# An asset bundle holds every image the game and its screens draw, already
+# decoded, cropped or scaled to the size it is drawn at, and stored as raw
+# 32-bit BGRA pixels (the byte order of the usual XRGB8888 display surface).
+# Loading an image is then a slice of one memory-mapped file, not a JPEG/PNG decode:
+#
+#   header   "<4sHHI"     magic b"ASPK", format version, reserved, image count
+#   index    "<24sIHHH"   one entry per image: name, byte offset of its pixels,
+#                         width, height, flags (FLAG_ALPHA: keep per-pixel alpha)
+#   pixels   width * height * 4 bytes per image, rows top to bottom, back to back
+#
+# Build it with `python -m logic.assetpack`. The game also rebuilds it when it
+# is missing or older than one of the source images.
+
+BUNDLE_MAGIC = b"ASPK"
+BUNDLE_VERSION = 1
+
+HEADER = struct.Struct("<4sHHI")
+INDEX_ENTRY = struct.Struct("<24sIHHH")
+FLAG_ALPHA = 1
+PIXEL_FORMAT = "BGRA"
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+DEFAULT_BUNDLE_PATH = os.path.join(ASSETS_DIR, "assets.bundle")
+
+# Image name -> (source file in assets/, keeps per-pixel alpha)
+IMAGES = {
+    "background": ("background.jpg", False),
+    "player": ("player.png", True),
+    "wall": ("wall.png", True),
+    "exit": ("exit.jpg", True),
+    "login_background": ("cobelstone.jpg", False),
+    "leaderboard_background": ("gold.jpeg", False),
+}
+
+
+def prepared_sizes():
+    """
+    How images are fitted before they are stored: name -> ("crop" | "scale", (width, height)).
+    Images not listed are stored at their own size (walls and the exit are scaled
+    per rect by the TextureCache; Kivy stretches the screen backgrounds on the GPU).
+    """
+    from logic.rules import SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_SIZE  # Deferred: pulls in numpy
+
+    return {
+        # The game blits the background unscaled at (0, 0), so only this part is ever seen
+        "background": ("crop", (SCREEN_WIDTH, SCREEN_HEIGHT)),
+        "player": ("scale", (PLAYER_SIZE, PLAYER_SIZE)),
+    }
+
+
+def build_asset_bundle(assets_dir=ASSETS_DIR):
+    """
+    Decode and fit every image in IMAGES and encode them into asset bundle bytes.
+    """
+    import pygame
+
+    sizes = prepared_sizes()
+    index = bytearray()
+    pixels = []
+    offset = HEADER.size + INDEX_ENTRY.size * len(IMAGES)
+    for name, (file_name, alpha) in IMAGES.items():
+        surface = pygame.image.load(os.path.join(assets_dir, file_name))
+        fit = sizes.get(name)
+        if fit is not None:
+            mode, size = fit
+            if mode == "crop":
+                surface = surface.subsurface((0, 0), (min(size[0], surface.get_width()),
+                                                      min(size[1], surface.get_height())))
+            else:
+                surface = pygame.transform.scale(surface, size)
+        data = pygame.image.tobytes(surface, PIXEL_FORMAT)
+        index += INDEX_ENTRY.pack(name.encode("utf-8"), offset, surface.get_width(), surface.get_height(),
+                                  FLAG_ALPHA if alpha else 0)
+        pixels.append(data)
+        offset += len(data)
+
+    return HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0, len(IMAGES)) + bytes(index) + b"".join(pixels)
+
+
+def write_asset_bundle(path=DEFAULT_BUNDLE_PATH, assets_dir=ASSETS_DIR, data=None):
+    """
+    Write an asset bundle (built from `assets_dir` unless `data` is given).
+    The file is replaced atomically, so a running game never maps a half-written bundle.
+    Returns the bundle bytes.
+    """
+    if data is None:
+        data = build_asset_bundle(assets_dir)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return data
+
+
+def is_stale(path=DEFAULT_BUNDLE_PATH, assets_dir=ASSETS_DIR):
+    """
+    True if the bundle is missing or older than one of the source images.
+    """
+    try:
+        built = os.path.getmtime(path)
+    except OSError:
+        return True
+    for file_name, _ in IMAGES.values():
+        try:
+            if os.path.getmtime(os.path.join(assets_dir, file_name)) > built:
+                return True
+        except OSError:
+            pass  # A missing source image is reported when something needs it
+    return False
+
+
+# -----------------------------
+# Bundle Reader
+# -----------------------------
+class AssetBundle:
+    """
+    Read-only view of an asset bundle: a memory-mapped file (`path`) or bytes (`data`).
+    Pixels are returned as memoryview slices, without copying.
+    """
+    def __init__(self, path=None, data=None):
+        self.path = path
+        self._file = None
+        if data is None:
+            self._file = open(path, "rb")
+            try:
+                data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                self._file.close()
+                raise ValueError(f"Asset bundle {path} is empty.")
+        self._data = data
+        self._view = memoryview(data)
+
+        magic, version, _, count = HEADER.unpack_from(data, 0)
+        if magic != BUNDLE_MAGIC:
+            self.close()
+            raise ValueError(f"{path or 'Data'} is not an asset bundle.")
+        if version != BUNDLE_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported asset bundle version {version} in {path or 'data'}.")
+
+        self._entries = {}  # name -> (offset, width, height, flags)
+        for position in range(count):
+            name, offset, width, height, flags = INDEX_ENTRY.unpack_from(data, HEADER.size + position * INDEX_ENTRY.size)
+            if offset + width * height * 4 > len(data):
+                self.close()
+                raise ValueError(f"Asset bundle {path or 'data'} is truncated.")
+            self._entries[name.rstrip(b"\0").decode("utf-8")] = (offset, width, height, flags)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return tuple(self._entries)
+
+    def size(self, name):
+        _, width, height, _ = self._entries[name]
+        return width, height
+
+    def has_alpha(self, name):
+        return bool(self._entries[name][3] & FLAG_ALPHA)
+
+    def pixels(self, name):
+        """
+        The image's BGRA pixels, rows top to bottom.
+        """
+        offset, width, height, _ = self._entries[name]
+        return self._view[offset:offset + width * height * 4]
+
+    def close(self):
+        self._view.release()
+        if self._file is not None:
+            self._data.close()
+            self._file.close()
+
+
+# -----------------------------
+# Shared Asset Manager
+# -----------------------------
+class AssetManager:
+    """
+    Single place the game (pygame surfaces) and the Kivy screens (textures) get
+    their images from. Each image is loaded from the bundle once per process and
+    then shared, so screens drawing the same background do not load it again.
+    """
+    def __init__(self, bundle_path=DEFAULT_BUNDLE_PATH, assets_dir=ASSETS_DIR):
+        self.bundle_path = bundle_path
+        self.assets_dir = assets_dir
+        self._bundle = None
+        self._surfaces = {}  # name -> pygame Surface in display format
+        self._textures = {}  # name -> Kivy Texture
+
+    def source_path(self, name):
+        return os.path.join(self.assets_dir, IMAGES[name][0])
+
+    def bundle(self, build=True):
+        """
+        The open AssetBundle. A missing or stale bundle is rebuilt if `build` is
+        True (this needs pygame to decode the sources); otherwise returns None.
+        """
+        if self._bundle is not None:
+            return self._bundle
+        if is_stale(self.bundle_path, self.assets_dir):
+            if not build:
+                return None
+            data = build_asset_bundle(self.assets_dir)
+            try:
+                write_asset_bundle(self.bundle_path, data=data)
+                print(f"Rebuilt asset bundle {self.bundle_path}")
+            except OSError as e:
+                # Read-only install: use the freshly built bundle from memory this time
+                print(f"Failed to write asset bundle {self.bundle_path}: {e}")
+                self._bundle = AssetBundle(data=data)
+                return self._bundle
+        try:
+            self._bundle = AssetBundle(self.bundle_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Failed to open asset bundle {self.bundle_path}: {e}")
+            if not build:
+                return None
+            self._bundle = AssetBundle(data=build_asset_bundle(self.assets_dir))
+        return self._bundle
+
+    def surface(self, name):
+        """
+        The image as a pygame Surface converted to the display format.
+        Needs pygame.display.set_mode() to have been called.
+        """
+        surface = self._surfaces.get(name)
+        if surface is None:
+            import pygame
+
+            bundle = self.bundle()
+            raw = pygame.image.frombuffer(bundle.pixels(name), bundle.size(name), PIXEL_FORMAT)
+            surface = raw.convert_alpha() if bundle.has_alpha(name) else raw.convert()
+            self._surfaces[name] = surface
+        return surface
+
+    def texture(self, name):
+        """
+        The image as a Kivy Texture. Without a bundle (it is only built where
+        pygame runs) Kivy decodes the source image instead.
+        """
+        texture = self._textures.get(name)
+        if texture is None:
+            bundle = self.bundle(build=False)
+            if bundle is None or name not in bundle:
+                from kivy.core.image import Image as CoreImage
+
+                texture = CoreImage(self.source_path(name)).texture
+            else:
+                from kivy.graphics.texture import Texture
+
+                texture = Texture.create(size=bundle.size(name), colorfmt="rgba")
+                # blit_buffer rejects read-only buffers such as the mapped file, so hand it a copy
+                texture.blit_buffer(bytes(bundle.pixels(name)), colorfmt="bgra", bufferfmt="ubyte")
+                texture.flip_vertical()  # Bundle rows run top to bottom, OpenGL's bottom to top
+            self._textures[name] = texture
+        return texture
+
+    def release_surfaces(self):
+        """
+        Drop the pygame surfaces, e.g. after pygame.quit(); the bundle stays mapped.
+        """
+        self._surfaces.clear()
+
+    def close(self):
+        self._surfaces.clear()
+        self._textures.clear()
+        if self._bundle is not None:
+            self._bundle.close()
+            self._bundle = None
+
+
+_shared_assets = None
+
+
+def get_assets():
+    """
+    The process-wide AssetManager, created on first use.
+    """
+    global _shared_assets
+    if _shared_assets is None:
+        _shared_assets = AssetManager()
+    return _shared_assets
+
+
+# -----------------------------
+# Command Line
+# -----------------------------
+if __name__ == '__main__':
+    # python -m logic.assetpack [assets.bundle]
+    if len(sys.argv) > 2:
+        print("Usage: python -m logic.assetpack [assets.bundle]")
+        sys.exit(1)
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    output_path = sys.argv[1] if len(sys.argv) == 2 else DEFAULT_BUNDLE_PATH
+    data = write_asset_bundle(output_path)
+    print(f"Wrote {len(IMAGES)} images ({len(data)} bytes) to {output_path}")
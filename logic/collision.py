@@ -0,0 +1,177 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# -----------------------------
+# Rectangle Helpers
+# -----------------------------
+# Rects are anything indexable as (x, y, width, height): pygame.Rect or plain tuples.
+
+def rects_overlap(a, b):
+    """
+    True if the two rects share a positive area (same rule as pygame.Rect.colliderect).
+    """
+    return a[0] < b[0] + b[2] and a[0] + a[2] > b[0] and a[1] < b[1] + b[3] and a[1] + a[3] > b[1]
+
+
+def swept_bounds(rect, dx, dy):
+    """
+    Bounding box of `rect` moving by (dx, dy): covers the start, the end and everything in between.
+    """
+    x, y, w, h = rect[0], rect[1], rect[2], rect[3]
+    left = min(x, x + dx)
+    top = min(y, y + dy)
+    return (left, top, w + abs(dx), h + abs(dy))
+
+
+# -----------------------------
+# Uniform Grid Spatial Index
+# -----------------------------
+class SpatialGrid:
+    """
+    Uniform-grid index over a level's walls. Each wall is registered in every
+    cell it touches, so a query only looks at walls near the queried area.
+    Queries return the original wall objects in level order.
+    """
+    def __init__(self, walls, cell_size=100):
+        self.walls = list(walls)
+        self.cell_size = cell_size
+        self._cells = {}  # (column, row) -> list of wall positions in self.walls
+        for position, wall in enumerate(self.walls):
+            for cell in self._cells_for(wall):
+                self._cells.setdefault(cell, []).append(position)
+
+    def _cells_for(self, rect):
+        size = self.cell_size
+        x, y, w, h = rect[0], rect[1], rect[2], rect[3]
+        # Right/bottom edges are exclusive, so a rect ending on a cell border stays out of the next cell;
+        # swept areas have fractional edges, so round the edge up rather than subtracting a pixel
+        first_column, last_column = int(x // size), math.ceil((x + max(w, 1)) / size) - 1
+        first_row, last_row = int(y // size), math.ceil((y + max(h, 1)) / size) - 1
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                yield (column, row)
+
+    def _candidates(self, rect):
+        x, y, w, h = rect[0], rect[1], rect[2], rect[3]
+        size = self.cell_size
+        if not all(math.isfinite(value) for value in (x, y, w, h)) or \
+                (w // size + 2) * (h // size + 2) > len(self._cells):
+            # Covers more cells than hold walls (a huge function step): every wall is a candidate
+            return list(range(len(self.walls)))
+        found = set()
+        for cell in self._cells_for(rect):
+            found.update(self._cells.get(cell, ()))
+        return sorted(found)
+
+    def query_rect(self, rect):
+        """
+        Returns the walls that overlap `rect`.
+        """
+        return [self.walls[i] for i in self._candidates(rect) if rects_overlap(rect, self.walls[i])]
+
+    def query_swept(self, rect, dx, dy):
+        """
+        Returns the walls that overlap the area `rect` sweeps while moving by (dx, dy).
+        This is a broad phase: a wall near the path's bounding box corner may be
+        returned even if the moving rect never touches it.
+        """
+        return [self.walls[i] for i in self.query_swept_positions(rect, dx, dy)]
+
+    def query_swept_positions(self, rect, dx, dy):
+        """
+        Like query_swept, but returns the walls' positions in the level (ascending).
+        """
+        bounds = swept_bounds(rect, dx, dy)
+        return [i for i in self._candidates(bounds) if rects_overlap(bounds, self.walls[i])]
+
+    def __len__(self):
+        return len(self.walls)
+
+
+# -----------------------------
+# Swept (Continuous) Collision
+# -----------------------------
+# A moving rect hits a wall when its path enters the wall grown by the rect's
+# size (Minkowski sum). Slab tests against every wall run as one NumPy batch.
+
+# `segment` is the move (path segment) where first contact happens, `time` the fraction
+# of that move travelled at contact (0..1) and `wall_index` the wall's position in the level.
+Impact = namedtuple("Impact", ["time", "segment", "wall_index"])
+
+
+def wall_bounds(walls):
+    """
+    Pack rect-like walls into an (N, 4) float64 array of (left, top, right, bottom).
+    Build it once per level and pass it to sweep_rect / sweep_path.
+    """
+    bounds = np.array([(w[0], w[1], w[0] + w[2], w[1] + w[3]) for w in walls], dtype=np.float64)
+    return bounds.reshape(-1, 4)
+
+
+def _slab_times(start, delta, low, high):
+    """
+    Entry/exit times of points moving from `start` by `delta` through the open interval (low, high).
+    Shapes broadcast as (segments, 1) against (1, walls).
+    """
+    moving = delta != 0
+    safe_delta = np.where(moving, delta, 1.0)
+    t1 = (low - start) / safe_delta
+    t2 = (high - start) / safe_delta
+    inside = (start > low) & (start < high)
+    enter = np.where(moving, np.minimum(t1, t2), np.where(inside, -np.inf, np.inf))
+    leave = np.where(moving, np.maximum(t1, t2), np.where(inside, np.inf, -np.inf))
+    return enter, leave
+
+
+def sweep_segments(size, starts_x, starts_y, deltas_x, deltas_y, bounds):
+    """
+    First impact of a (width, height) rect making a series of moves: move i starts
+    with the top-left corner at (starts_x[i], starts_y[i]) and goes by (deltas_x[i], deltas_y[i]).
+    Moves are checked in order against every wall in one batch.
+    Returns an Impact, or None if every move is clear.
+    """
+    if len(bounds) == 0 or len(starts_x) == 0:
+        return None
+
+    start_x = np.asarray(starts_x, dtype=np.float64)[:, None]
+    start_y = np.asarray(starts_y, dtype=np.float64)[:, None]
+    delta_x = np.asarray(deltas_x, dtype=np.float64)[:, None]
+    delta_y = np.asarray(deltas_y, dtype=np.float64)[:, None]
+    # Walls grown by the rect size, so the rect can be treated as its top-left point
+    left, top = bounds[None, :, 0] - size[0], bounds[None, :, 1] - size[1]
+    right, bottom = bounds[None, :, 2], bounds[None, :, 3]
+
+    with np.errstate(invalid="ignore"):
+        x_enter, x_leave = _slab_times(start_x, delta_x, left, right)
+        y_enter, y_leave = _slab_times(start_y, delta_y, top, bottom)
+        enter = np.maximum(x_enter, y_enter)
+        leave = np.minimum(x_leave, y_leave)
+        hit = (enter < leave) & (enter < 1) & (leave > 0)
+    if not hit.any():
+        return None
+
+    times = np.where(hit, np.maximum(enter, 0.0), np.inf)
+    segment = int(np.argmax(hit.any(axis=1)))  # Moves are in path order, so the first one with a hit wins
+    wall_index = int(np.argmin(times[segment]))
+    return Impact(float(times[segment, wall_index]), segment, wall_index)
+
+
+def sweep_path(size, path_x, path_y, bounds):
+    """
+    First impact of a (width, height) rect whose top-left corner follows the
+    points of (path_x, path_y), checked segment by segment against every wall.
+    Returns an Impact, or None if the whole path is clear.
+    """
+    path_x = np.asarray(path_x, dtype=np.float64)
+    path_y = np.asarray(path_y, dtype=np.float64)
+    return sweep_segments(size, path_x[:-1], path_y[:-1], np.diff(path_x), np.diff(path_y), bounds)
+
+
+def sweep_rect(rect, dx, dy, bounds):
+    """
+    First impact of `rect` moving by (dx, dy) against the walls in `bounds`.
+    Impact.time is between 0 (already overlapping) and 1, or None if the move is clear.
+    """
+    return sweep_segments((rect[2], rect[3]), (rect[0],), (rect[1],), (dx,), (dy,), bounds)
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+import psycopg2
+from psycopg2 import pool
+
+load_dotenv()
+
+# Connection settings come from the environment or a .env file (see .env.example).
+# There is no built-in server: without them the game plays offline.
+POSTGRES_HOST = os.getenv('POSTGRES_HOST')   # e.g., "localhost" or "remote.server.com"
+POSTGRES_DB = os.getenv('POSTGRES_DB')
+POSTGRES_USER = os.getenv('POSTGRES_USER')
+POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')  # May be left out for .pgpass or trust authentication
+POSTGRES_PORT = os.getenv('POSTGRES_PORT', "5432")
+
+# Settings a connection cannot do without: environment variable -> psycopg2 parameter
+REQUIRED_SETTINGS = {"POSTGRES_HOST": "host", "POSTGRES_DB": "dbname", "POSTGRES_USER": "user"}
+
+POOL_MIN_CONNECTIONS = 1
+POOL_MAX_CONNECTIONS = 5
+ACQUIRE_TIMEOUT = 10         # Seconds to wait for a free connection before giving up
+HEALTH_CHECK_INTERVAL = 30   # Idle seconds after which a pooled connection is pinged before reuse
+CONNECT_TIMEOUT = 5          # Seconds psycopg2 may spend opening a new connection
+
+
+class DatabaseError(Exception):
+    """Raised when no healthy database connection can be handed out."""
+
+
+def connection_params(**connect_kwargs):
+    """
+    psycopg2 connection parameters: the POSTGRES_* settings, overridden by `connect_kwargs`.
+    """
+    params = {
+        "host": POSTGRES_HOST,
+        "dbname": POSTGRES_DB,
+        "user": POSTGRES_USER,
+        "password": POSTGRES_PASSWORD,
+        "port": POSTGRES_PORT,
+        "connect_timeout": CONNECT_TIMEOUT,
+    }
+    params.update(connect_kwargs)
+    return params
+
+
+def missing_settings(**connect_kwargs):
+    """
+    Names of the required POSTGRES_* settings that are not set (and not given in `connect_kwargs`).
+    """
+    params = connection_params(**connect_kwargs)
+    return [name for name, key in REQUIRED_SETTINGS.items() if not params.get(key)]
+
+
+# -----------------------------
+# Connection Pool
+# -----------------------------
+class Database:
+    """
+    Bounded pool of PostgreSQL connections shared by login, gameplay and the leaderboard.
+    Use `with db.connection() as conn:` around each unit of work; the connection is
+    health-checked on the way out of the pool and returned to it afterwards.
+    """
+    def __init__(self, minconn=POOL_MIN_CONNECTIONS, maxconn=POOL_MAX_CONNECTIONS, **connect_kwargs):
+        missing = missing_settings(**connect_kwargs)
+        if missing:
+            raise DatabaseError(f"Database settings missing: {', '.join(missing)} (set them in .env or the environment).")
+        self._pool = pool.ThreadedConnectionPool(minconn, maxconn, **connection_params(**connect_kwargs))
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}  # id(conn) -> time.monotonic() when it went back to the pool
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < HEALTH_CHECK_INTERVAL:
+            return True  # Freshly opened or recently used
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def acquire(self):
+        """
+        Take a healthy connection out of the pool, reconnecting if a pooled one has died.
+        Blocks up to ACQUIRE_TIMEOUT seconds when every connection is in use.
+        """
+        if not self._slots.acquire(timeout=ACQUIRE_TIMEOUT):
+            raise DatabaseError("Timed out waiting for a free database connection.")
+        try:
+            # A dead pooled connection is dropped and replaced; a fresh one is tried once more
+            for _ in range(2):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                print("Dropping broken database connection, reconnecting...")
+                self._discard(conn)
+            raise DatabaseError("Could not get a healthy database connection.")
+        except (psycopg2.Error, pool.PoolError) as e:
+            self._slots.release()
+            raise DatabaseError(f"Failed to connect to database: {e}")
+        except DatabaseError:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """
+        Give a connection back to the pool. Broken connections are closed instead of reused.
+        """
+        try:
+            if broken or conn.closed:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Acquire a connection for the duration of a `with` block. Uncommitted work is
+        rolled back when the block raises, and connection errors discard the connection.
+        """
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    def close(self):
+        """
+        Close every connection in the pool.
+        """
+        self._pool.closeall()
+        self._last_used.clear()
+
+
+def create_database(minconn=POOL_MIN_CONNECTIONS, maxconn=POOL_MAX_CONNECTIONS):
+    """
+    Create the shared connection pool.
+    Returns a Database or None if the server cannot be reached.
+    """
+    try:
+        return Database(minconn, maxconn)
+    except Exception as e:
+        print("Failed to connect to database:", e)
+        return None
@@ -0,0 +1,173 @@
+import ast
+import copy
+import math
+from functools import lru_cache
+
+# -----------------------------
+# Expression Whitelist
+# -----------------------------
+# User functions are typed as "<seq_type>!y=<expression>", e.g. "asc!y=x*2".
+# The expression may only use `x`, numbers, arithmetic operators and the
+# math helpers below; anything else is rejected before it is compiled.
+
+SEQ_TYPES = ("asc", "desc")
+
+# Integer powers may not grow past this many bits: `9**9**9` would otherwise
+# keep the game loop busy for minutes inside a single frame
+MAX_INT_BITS = 4096
+
+
+def safe_pow(base, exponent, modulus=None):
+    """
+    pow() for user functions: refuses integer powers larger than MAX_INT_BITS bits
+    with ValueError instead of computing them. Float powers overflow on their own.
+    """
+    if modulus is None and isinstance(base, int) and isinstance(exponent, int) \
+            and exponent > 0 and abs(base) > 1 and exponent * abs(base).bit_length() > MAX_INT_BITS:
+        raise ValueError("Number too large: the power has too many digits.")
+    if modulus is None:
+        return pow(base, exponent)
+    return pow(base, exponent, modulus)
+
+
+SAFE_GLOBALS = {
+    "__builtins__": {},
+    "math": math,
+    "cos": math.cos,
+    "sin": math.sin,
+    "abs": abs,
+    "pow": safe_pow,  # `a ** b` is compiled into a call to this too
+}
+
+ALLOWED_NAMES = {"x"} | set(SAFE_GLOBALS) - {"__builtins__"}
+
+# math.<name> a function may use: functions of floats, which finish in constant
+# time, and constants. Integer helpers such as factorial, comb, perm and prod
+# are left out, since their cost grows with their arguments.
+ALLOWED_MATH_ATTRIBUTES = frozenset({
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2",
+    "sinh", "cosh", "tanh", "asinh", "acosh", "atanh",
+    "exp", "expm1", "log", "log2", "log10", "log1p", "sqrt", "pow", "hypot",
+    "fabs", "floor", "ceil", "trunc", "fmod", "copysign", "degrees", "radians",
+    "pi", "e", "tau",
+})
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Attribute,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.UAdd, ast.USub,
+)
+
+CACHE_SIZE = 128
+
+
+def normalize_text(text):
+    """
+    Strip and collapse whitespace so trivially different inputs share a cache entry.
+    """
+    return " ".join(text.split())
+
+
+def validate_expression(tree):
+    """
+    Raise ValueError unless every node of the parsed expression is whitelisted.
+    """
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"'{type(node).__name__}' is not allowed in a function.")
+        if isinstance(node, ast.Name) and node.id not in ALLOWED_NAMES:
+            raise ValueError(f"Unknown name '{node.id}'. Only x, math, sin, cos, abs and pow are allowed.")
+        if isinstance(node, ast.Attribute):
+            if not (isinstance(node.value, ast.Name) and node.value.id == "math"):
+                raise ValueError("Only math.<function> attributes are allowed.")
+            if node.attr not in ALLOWED_MATH_ATTRIBUTES:
+                raise ValueError(f"math.{node.attr} is not allowed in a function.")
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or
+                                               not isinstance(node.value, (int, float))):
+            raise ValueError(f"Constant {node.value!r} is not a number.")
+        if isinstance(node, ast.Call) and node.keywords:
+            raise ValueError("Keyword arguments are not allowed.")
+
+
+def parse_expression(expression):
+    """
+    Parse a math expression of `x` and validate it against the whitelist.
+    Returns the ast.Expression tree or raises ValueError.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid mathematical expression: {expression}. Error: {e.msg}")
+    validate_expression(tree)
+    return tree
+
+
+class _PowToCall(ast.NodeTransformer):
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.Call(func=ast.Name(id="pow", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        return node
+
+
+def build_function(tree, namespace):
+    """
+    Turn a validated expression tree into `lambda x: <expression>` evaluated in `namespace`.
+    Every `a ** b` becomes `pow(a, b)`, so it goes through the namespace's bounded pow.
+    """
+    function_tree = ast.Expression(ast.Lambda(
+        args=ast.arguments(posonlyargs=[], args=[ast.arg(arg="x")], kwonlyargs=[],
+                           kw_defaults=[], defaults=[]),
+        body=_PowToCall().visit(copy.deepcopy(tree.body)),
+    ))
+    ast.fix_missing_locations(function_tree)
+    code = compile(function_tree, "<user function>", "eval")
+    return eval(code, namespace)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_expression(expression):
+    return build_function(parse_expression(expression), SAFE_GLOBALS)
+
+
+def compile_expression(expression):
+    """
+    Validate and compile a math expression of `x` into a function.
+    Results are memoized by normalized expression text.
+    """
+    return _compile_expression(normalize_text(expression))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_user_function(user_input):
+    pack = user_input.split("!")
+    if len(pack) != 2:
+        raise ValueError("Invalid format. Expected format: <seq_type>!<expression> (e.g., asc!y=x-5).")
+
+    seq_type = pack[0].strip().lower()
+    if seq_type not in SEQ_TYPES:
+        raise ValueError(f"Invalid sequence type: {pack[0]}. Expected 'asc' or 'desc'.")
+
+    sides = pack[1].split("=")
+    if len(sides) != 2 or not sides[1].strip():
+        raise ValueError("Invalid format. Expected format: <seq_type>!y=<expression> (e.g., asc!y=x-5).")
+
+    math_expression = sides[1].strip()
+    return seq_type, math_expression, compile_expression(math_expression)
+
+
+def compile_user_function(user_input):
+    """
+    Parse "<seq_type>!y=<expression>" input into (seq_type, expression, function).
+    Raises ValueError on bad input. Repeated inputs are served from an LRU cache.
+    """
+    return _compile_user_function(normalize_text(user_input))
+
+
+def cache_info():
+    """
+    Returns the hit/miss counters of the user-function and expression caches.
+    """
+    return {"user_functions": _compile_user_function.cache_info(),
+            "expressions": _compile_expression.cache_info()}
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from logic.levelpack import open_level_registry
+from logic.simulation import simulate, COMPLETED, DEFAULT_MAX_FRAMES
+
+# -----------------------------
+# Batch Grader
+# -----------------------------
+# Grades a JSONL file of submissions, one per line:
+#   {"user": "anna", "level": 3, "functions": ["asc!y=x", "desc!y=-x//3"]}
+# Each record is played by the headless engine (logic/simulation.py) in a
+# process pool, and one JSONL result per record is written in input order.
+# Records that take too long or crash their worker get an "error" result.
+
+DEFAULT_CHUNKSIZE = 16
+RECORD_TIMEOUT = 10.0         # Seconds one record may run before it is given up on
+MAX_BUFFERED_RESULTS = 10000  # Finished results held back behind a slow earlier record
+
+_levels = None  # Level registry, opened once per worker process
+_max_frames = DEFAULT_MAX_FRAMES
+_with_path = False
+
+
+def _init_worker(max_frames, with_path):
+    global _levels, _max_frames, _with_path
+    _levels = open_level_registry()
+    _max_frames = max_frames
+    _with_path = with_path
+
+
+def grade_line(line):
+    """
+    Grade one JSONL submission line and return the result as a JSON string.
+    Bad records produce a result with an "error" field instead of stopping the run.
+    """
+    if _levels is None:
+        _init_worker(_max_frames, _with_path)
+
+    try:
+        record = json.loads(line)
+        user = record.get("user")
+        level_number = int(record["level"])
+        functions = record["functions"]
+        if not isinstance(functions, list) or not all(isinstance(f, str) for f in functions):
+            raise ValueError("'functions' must be a list of strings.")
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return json.dumps({"error": f"Invalid record: {e}"})
+
+    level = _levels.get(level_number)
+    if level is None:
+        return json.dumps({"user": user, "level": level_number, "error": f"Unknown level: {level_number}"})
+
+    result = simulate(level, functions, _max_frames)
+    graded = {
+        "user": user,
+        "level": level_number,
+        "completed": result.outcome == COMPLETED,
+        "outcome": result.outcome,
+        "frames": result.frames,
+        "inputs_used": result.inputs_used,
+    }
+    if _with_path:
+        graded["path"] = result.path
+    return json.dumps(graded)
+
+
+def _error_line(line, message):
+    """
+    Result line for a record that could not be graded, keeping its user and level if readable.
+    """
+    try:
+        record = json.loads(line)
+        graded = {"user": record.get("user"), "level": record.get("level")}
+    except (ValueError, AttributeError):
+        graded = {}
+    graded["error"] = message
+    return json.dumps(graded)
+
+
+def _new_pool(workers, max_frames, with_path):
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(max_frames, with_path))
+
+
+def _kill_pool(pool):
+    """
+    Stop a pool whose workers may be stuck. ProcessPoolExecutor cannot cancel a
+    call that is already running, so its worker processes are killed outright.
+    """
+    # ProcessPoolExecutor has no public way to reach its workers: `_processes`
+    # (pid -> multiprocessing.Process) is private, so do without it if it goes away
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+def grade_lines(lines):
+    """
+    Grade a batch of (index, line) pairs in one task; returns (index, result) pairs.
+    """
+    return [(index, grade_line(line)) for index, line in lines]
+
+
+def grade_file(input_file, output_file, workers=None, chunksize=DEFAULT_CHUNKSIZE, timeout=RECORD_TIMEOUT,
+               max_frames=DEFAULT_MAX_FRAMES, with_path=False):
+    """
+    Grade every non-blank line of `input_file` and write results to `output_file`
+    in input order, as soon as each one (and every one before it) is done.
+
+    Records go to the workers `chunksize` at a time, and a batch may run `timeout`
+    seconds per record. A batch that runs longer is split up and its records run
+    one per task; a record that alone takes longer than `timeout` is written as an
+    "error" result. A stuck worker can only be stopped by replacing the pool, so
+    once a task overruns no new work is started, the other running tasks finish
+    first, and then the pool is replaced. If a worker dies (MemoryError, OOM
+    killer), the records it may have been running are run again one at a time,
+    so only the one that crashes it again gets an error.
+    Returns the number of records written.
+    """
+    workers = workers or os.cpu_count() or 1
+    lines = enumerate(line for line in input_file if line.strip())
+    exhausted = False
+    singles = deque()   # (index, line) to run in a task of its own
+    isolated = deque()  # (index, line) in flight when a worker died: run one at a time, with nothing else
+    running = {}        # future -> (batch, deadline, isolated)
+    overdue = set()     # futures in `running` past their deadline, waiting for the pool to be replaced
+    results = {}        # index -> result line, until every earlier line is written
+    written = 0
+
+    pool = _new_pool(workers, max_frames, with_path)
+    try:
+        while True:
+            # At most one task per worker is in flight, so each starts right after it is submitted.
+            # Nothing new starts while an overdue task waits for the pool to be replaced.
+            limit = 0 if overdue else 1 if isolated else workers
+            broken = False
+            while len(running) < limit:
+                if isolated:
+                    batch, alone = [isolated.popleft()], True
+                elif singles:
+                    batch, alone = [singles.popleft()], False
+                elif not exhausted and len(results) < MAX_BUFFERED_RESULTS:
+                    batch, alone = list(islice(lines, chunksize)), False
+                    if not batch:
+                        exhausted = True
+                        break
+                else:
+                    break
+                try:
+                    running[pool.submit(grade_lines, batch)] = (batch, time.monotonic() + timeout * len(batch), alone)
+                except BrokenProcessPool:
+                    # A worker died since the last wait: nothing can be submitted until the pool is replaced
+                    isolated.extendleft(reversed(batch))
+                    broken = True
+                    break
+            if not running and not broken:
+                break
+
+            done = ()
+            deadlines = [deadline for future, (_, deadline, _) in running.items() if future not in overdue]
+            if not broken and deadlines:
+                done, _ = wait(running, timeout=max(min(deadlines) - time.monotonic(), 0),
+                               return_when=FIRST_COMPLETED)
+            for future in done:
+                overdue.discard(future)  # Slow, but it did finish
+                batch, _, alone = running.pop(future)
+                try:
+                    results.update(future.result())
+                except BrokenProcessPool:
+                    if alone:
+                        index, line = batch[0]
+                        results[index] = _error_line(line, "The grader worker crashed on this record "
+                                                           "(out of memory?).")
+                    else:
+                        isolated.extend(batch)
+                        broken = True
+                except Exception as e:
+                    for index, line in batch:
+                        results[index] = _error_line(line, f"Grading failed: {e}")
+
+            now = time.monotonic()
+            overdue.update(future for future, (_, deadline, _) in running.items() if deadline <= now)
+            # Replace the pool once only overdue tasks are left, or at once if a worker died
+            if broken or (overdue and len(overdue) == len(running)):
+                for future, (batch, _, alone) in running.items():
+                    if future.done() and future.exception() is None:
+                        results.update(future.result())
+                    elif future in overdue:
+                        if len(batch) == 1:
+                            index, line = batch[0]
+                            results[index] = _error_line(line, f"Timed out after {timeout:g} s.")
+                        else:
+                            singles.extend(batch)
+                    elif broken or alone:
+                        isolated.extend(batch)  # May have been running in the worker that died
+                    else:
+                        singles.extend(batch)
+                running.clear()
+                overdue.clear()
+                _kill_pool(pool)
+                pool = _new_pool(workers, max_frames, with_path)
+
+            while written in results:
+                output_file.write(results.pop(written) + "\n")
+                written += 1
+    finally:
+        _kill_pool(pool)
+    output_file.flush()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m logic.grader",
+                                     description="Grade function-game submissions headlessly.")
+    parser.add_argument("input", help="JSONL file of {user, level, functions} records ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("-c", "--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="records per task")
+    parser.add_argument("-t", "--timeout", type=float, default=RECORD_TIMEOUT,
+                        help=f"seconds one record may run (default {RECORD_TIMEOUT:g})")
+    parser.add_argument("--max-frames", type=int, default=DEFAULT_MAX_FRAMES, help="frame limit per record")
+    parser.add_argument("--path", action="store_true", help="include the player's path in each result")
+    args = parser.parse_args(argv)
+
+    # Compile a stale level pack once here rather than in every worker, and stop on invalid levels
+    try:
+        open_level_registry()
+    except ValueError as e:
+        print(f"Cannot grade: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = grade_file(input_file, output_file, args.workers, args.chunksize, args.timeout, args.max_frames, args.path)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    print(f"Graded {count} submissions.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# -----------------------------
+# Startup Import-Time Report
+# -----------------------------
+# Runs each startup phase's imports in a fresh interpreter with `-X importtime`
+# and reports how long they took, plus the slowest modules. Run it on the lab
+# PCs to track cold start:
+#   python -m logic.importreport            # every phase
+#   python -m logic.importreport --json     # machine-readable, e.g. to keep a history
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Phase name -> modules it imports, in the order the game needs them
+PHASES = {
+    "main": ["main"],
+    "storage": ["logic.storage"],
+    "database driver": ["logic.db", "logic.utils"],
+    "login screen": ["logic.ui"],
+    "game": ["pygame", "logic.render", "logic.textinput", "logic.rules", "logic.expressions"],
+    "leaderboard": ["logic.leaderboard"],
+}
+
+DEFAULT_RUNS = 3
+DEFAULT_TOP = 10
+
+
+def parse_importtime(output):
+    """
+    Parse `-X importtime` stderr into [(module, self_us, cumulative_us)].
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header line
+        modules.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return modules
+
+
+def measure(modules):
+    """
+    Import `modules` in a fresh interpreter and return its parsed importtime output.
+    """
+    env = dict(os.environ, KIVY_NO_ARGS="1", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    code = "import " + ", ".join(modules) if modules else "pass"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"Importing {', '.join(modules)} failed:\n{result.stderr.strip()[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def interpreter_modules():
+    """
+    Modules every interpreter imports at startup (site, encodings, ...).
+    """
+    return {module for module, _, _ in measure([])}
+
+
+def report_phase(name, modules, runs=DEFAULT_RUNS, top=DEFAULT_TOP, baseline=()):
+    """
+    Measure one phase `runs` times, leaving out the `baseline` modules.
+    Returns a dict with the median total (ms) and the `top` slowest modules
+    by their own import time in the median run.
+    """
+    samples = []
+    for _ in range(runs):
+        parsed = [row for row in measure(modules) if row[0] not in baseline]
+        total = sum(self_us for _, self_us, _ in parsed)
+        samples.append((total, parsed))
+    samples.sort(key=lambda sample: sample[0])
+    total, parsed = samples[len(samples) // 2]
+    slowest = sorted(parsed, key=lambda row: row[1], reverse=True)[:top]
+    return {
+        "phase": name,
+        "modules": modules,
+        "total_ms": round(total / 1000, 1),
+        "spread_ms": round((samples[-1][0] - samples[0][0]) / 1000, 1),
+        "module_count": len(parsed),
+        "slowest": [{"module": module, "self_ms": round(self_us / 1000, 1),
+                     "cumulative_ms": round(cumulative_us / 1000, 1)}
+                    for module, self_us, cumulative_us in slowest],
+    }
+
+
+def print_report(reports):
+    for report in reports:
+        print(f"{report['phase']}: {report['total_ms']} ms "
+              f"(+/- {report['spread_ms']} ms, {report['module_count']} modules) "
+              f"<- import {', '.join(report['modules'])}")
+        for row in report["slowest"]:
+            print(f"    {row['self_ms']:8.1f} ms  {row['module']}  (cumulative {row['cumulative_ms']} ms)")
+    print("Each phase is measured in a fresh interpreter, without the interpreter's own startup")
+    print("imports; dependencies shared by several phases count in each of them.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m logic.importreport",
+                                     description="Report the import time of each startup phase.")
+    parser.add_argument("phases", nargs="*", help=f"phases to measure (default: all of {', '.join(PHASES)})")
+    parser.add_argument("-m", "--module", action="append", default=[], help="also measure an extra module")
+    parser.add_argument("-n", "--runs", type=int, default=DEFAULT_RUNS, help="runs per phase, the median is shown")
+    parser.add_argument("-t", "--top", type=int, default=DEFAULT_TOP, help="slowest modules listed per phase")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [phase for phase in args.phases if phase not in PHASES]
+    if unknown:
+        parser.error(f"unknown phase(s): {', '.join(unknown)}")
+    phases = [(phase, PHASES[phase]) for phase in (args.phases or ([] if args.module else PHASES))]
+    phases += [(module, [module]) for module in args.module]
+
+    baseline = interpreter_modules()
+    reports = [report_phase(name, modules, args.runs, args.top, baseline) for name, modules in phases]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_report(reports)
+
+
+if __name__ == '__main__':
+    main()
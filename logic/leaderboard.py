@@ -1,5 +1,5 @@
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.gridlayout import GridLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.app import App
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.boxlayout import BoxLayout
@@ -7,19 +7,74 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.core.window import Window
 from kivy.graphics import Rectangle
-import os
+from kivy.clock import Clock
 import sys
 import gc
-from logic.utils import create_connection, get_all_users_scores# Ensure this function retrieves scores from a database
+import threading
+from logic.storage import Storage
+from logic.utils import LEADERBOARD_PAGE_SIZE
+from logic.assetpack import get_assets
 
+ROW_HEIGHT = 40
+ROW_SPACING = 20
+
+# -----------------------------
+# Paged Leaderboard Data
 # -----------------------------
-# Function to Get Background Image Path
+class LeaderboardSource:
+    """
+    Loads the ranked leaderboard one page at a time, on a background thread.
+    `fetch_page(after, limit)` returns [(rank, username, high_score)], e.g. Storage.get_leaderboard_page.
+    """
+    def __init__(self, fetch_page, page_size=LEADERBOARD_PAGE_SIZE):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.after = None  # (high_score, username) of the last loaded row
+        self.exhausted = False
+        self.loading = False
+
+    def load_more(self, on_rows):
+        """
+        Fetch the next page and pass its rows to `on_rows` on the Kivy thread.
+        Does nothing while a page is already loading or after the last page.
+        """
+        if self.loading or self.exhausted:
+            return
+        self.loading = True
+        threading.Thread(target=self._load, args=(on_rows,), daemon=True).start()
+
+    def _load(self, on_rows):
+        try:
+            rows = self.fetch_page(self.after, self.page_size)
+        except Exception as e:
+            print(f"Error fetching scores: {e}")
+            rows = []
+        Clock.schedule_once(lambda dt: self._loaded(rows, on_rows))
+
+    def _loaded(self, rows, on_rows):
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            rank, username, score = rows[-1]
+            self.after = (score, username)
+        self.loading = False
+        on_rows(rows)
+
+
 # -----------------------------
-def get_bg_image_path():
-    """Returns the path of the background image stored in the 'assets' folder."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(base_dir)
-    return os.path.join(project_root, "assets", "gold.jpeg")  # Ensure this file exists!
+# Score Row (reused by the RecycleView)
+# -----------------------------
+class ScoreRow(Label):
+    """
+    One leaderboard line. The RecycleView only creates enough of these to fill the
+    screen and re-binds them to other rows as the list scrolls.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.font_size = 22  # Slightly larger font
+        self.bold = True
+        self.color = (0, 0, 0, 1)  # Black color
+
 
 # -----------------------------
 # Scores Screen with Texture Background
@@ -28,10 +83,11 @@ class ScoresScreen(Screen):
     def __init__(self, app, **kwargs):
         super().__init__(**kwargs)
         self.app = app
+        self.source = None  # LeaderboardSource, set by load_scores
 
         # Apply background image
         with self.canvas.before:
-            self.bg_rect = Rectangle(source=get_bg_image_path(), pos=self.pos, size=self.size)
+            self.bg_rect = Rectangle(texture=get_assets().texture("leaderboard_background"), pos=self.pos, size=self.size)
         self.bind(pos=self.update_bg, size=self.update_bg)
 
         # Main Layout
@@ -40,12 +96,20 @@ class ScoresScreen(Screen):
         # Title Label
         layout.add_widget(Label(text='Таблица результатов', font_size=30, bold=True))
 
-        # Scrollable Score List
-        scroll_view = ScrollView(size_hint=(1, 0.8), do_scroll_x=False)  # Only vertical scrolling
-        self.scores_layout = GridLayout(cols=1, spacing=20, size_hint_y=None)  # Increase spacing
-        self.scores_layout.bind(minimum_height=self.scores_layout.setter('height'))  # Make it scrollable
-        scroll_view.add_widget(self.scores_layout)
-        layout.add_widget(scroll_view)
+        # The current user's place, filled in by show_rank
+        self.rank_label = Label(text='', font_size=22, size_hint=(1, 0.1))
+        layout.add_widget(self.rank_label)
+
+        # Scrollable, virtualized score list: only the visible rows have widgets
+        self.scores_view = RecycleView(size_hint=(1, 0.8), do_scroll_x=False)  # Only vertical scrolling
+        scores_layout = RecycleBoxLayout(orientation='vertical', spacing=ROW_SPACING, size_hint_y=None,
+                                         default_size=(None, ROW_HEIGHT), default_size_hint=(1, None))
+        scores_layout.bind(minimum_height=scores_layout.setter('height'))  # Make it scrollable
+        self.scores_view.add_widget(scores_layout)
+        # viewclass lives on the layout, so it can only be set once the layout is added
+        self.scores_view.viewclass = ScoreRow
+        self.scores_view.bind(scroll_y=self.on_scroll)
+        layout.add_widget(self.scores_view)
 
         # Close Button (instead of "Back")
         close_button = Button(text='Выйти', size_hint=(1, 0.2))
@@ -59,36 +123,63 @@ class ScoresScreen(Screen):
         self.bg_rect.pos = self.pos
         self.bg_rect.size = self.size
 
-    def update_scores(self, scores):
-        """Updates the displayed scores dynamically with black text and spacing."""
-        self.scores_layout.clear_widgets()
-        for player, score in scores.items():
-            label = Label(
-                text=f'{player}: {score}',
-                font_size=22,  # Slightly larger font
-                bold=True,
-                color=(0, 0, 0, 1),  # Black color
-                size_hint_y=None,
-                height=40  # More space between lines
-            )
-            self.scores_layout.add_widget(label)
+    def load_scores(self, source):
+        """Start showing the leaderboard from a LeaderboardSource, first page first."""
+        self.source = source
+        self.scores_view.data = []
+        source.load_more(self.add_scores)
+
+    def add_scores(self, rows):
+        """Append a page of (rank, username, high_score) rows to the list."""
+        view = self.scores_view
+        # scroll_y is relative to the list height; remember the position in pixels
+        # so the rows on screen stay put when the list grows
+        scrolled = (1 - view.scroll_y) * self.hidden_height()
+        view.data.extend(
+            {'text': f'{rank}. {player}: {score}'} for rank, player, score in rows
+        )
+        Clock.schedule_once(lambda dt: self.restore_scroll(scrolled))
+
+    def restore_scroll(self, scrolled):
+        hidden = self.hidden_height()
+        if hidden > 0:
+            self.scores_view.scroll_y = max(0, 1 - scrolled / hidden)
+        # Keep loading while the list does not fill the view yet
+        self.on_scroll(self.scores_view, self.scores_view.scroll_y)
+
+    def hidden_height(self):
+        """Height of the list that does not fit in the view."""
+        view = self.scores_view
+        return view.children[0].height - view.height if view.children else 0
+
+    def on_scroll(self, view, scroll_y):
+        """Fetch the next page once the user scrolls within one screen of the end."""
+        if self.source is None:
+            return
+        hidden = self.hidden_height()
+        if hidden <= 0 or scroll_y * hidden < view.height:
+            self.source.load_more(self.add_scores)
+
+    def show_rank(self, rank):
+        """Show the current user's (rank, high_score) above the list."""
+        if rank:
+            self.rank_label.text = f'Ваше место: {rank[0]} ({rank[1]})'
 
     def close_program(self, instance):
-        """Closes the Kivy application."""
-        print("Closing the application...")
+        """Closes the leaderboard and returns to whoever opened it."""
+        print("Closing the leaderboard...")
         App.get_running_app().stop()  # Properly stop Kivy app
-        sys.exit()  # Force exit the script
 
 
 # -----------------------------
 # Main ScoreApp Class
 # -----------------------------
 class ScoreApp(App):
-    def __init__(self, conn, scores, **kwargs):
+    def __init__(self, storage, username=None, **kwargs):
         super().__init__(**kwargs)
-        self.conn = conn
+        self.storage = storage  # logic.storage.Storage, works online and offline
+        self.username = username  # Player whose place is shown, if any
         self.scores_screen = None
-        self.scores_data = scores  # Store the scores passed during initialization
 
     def build(self):
         sm = ScreenManager()
@@ -97,9 +188,19 @@ class ScoreApp(App):
         return sm
 
     def on_start(self):
-        """Updates the scores when the app starts."""
-        if self.scores_data:
-            self.scores_screen.update_scores(self.scores_data)
+        """Starts loading the scores (and the player's place) when the app starts."""
+        self.scores_screen.load_scores(LeaderboardSource(self.storage.get_leaderboard_page))
+        if self.username:
+            threading.Thread(target=self.load_rank, daemon=True).start()
+
+    def load_rank(self):
+        """Look up the player's place off the UI thread; the first lookup may load the leaderboard."""
+        try:
+            rank = self.storage.get_user_rank(self.username)
+        except Exception as e:
+            print(f"Error fetching rank: {e}")
+            return
+        Clock.schedule_once(lambda dt: self.scores_screen.show_rank(rank))
 
     def terminate(self):
         """Ensure the app and window are fully closed."""
@@ -111,14 +212,30 @@ class ScoreApp(App):
         print("App instance terminated. Returning to main program.")
 
 
+# -----------------------------
+# Launch
+# -----------------------------
+def show_leaderboard(storage, username=None):
+    """
+    Show the leaderboard with `storage` (a logic.storage.Storage, or the
+    logic.leaderboard_process.RemoteScores main.py's leaderboard process gets).
+    Returns when the player closes it.
+    """
+    print("Displaying leaderboard...")
+    Window.show()  # The leaderboard process creates its window hidden
+    app = ScoreApp(storage, username=username)
+    app.run()
+    app.terminate()
+
+
 # -----------------------------
 # Example Usage
 # -----------------------------
 if __name__ == '__main__':
-    conn = create_connection()  # Establish database connection
+    storage = Storage()
+    storage.connect_in_background()
+    storage.wait_for_connection()  # Show the server's leaderboard if it is reachable
 
-    # Example: Simulating score retrieval from a database (many scores to test scrolling)
-    # Start the Kivy application with scores
-    app = ScoreApp(conn, get_all_users_scores(conn))
-    app.run()
-    sys.exit()
+    # Start the Kivy application; scores are loaded page by page while scrolling
+    show_leaderboard(storage, username=sys.argv[1] if len(sys.argv) > 1 else None)
+    storage.close()
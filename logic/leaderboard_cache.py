@@ -0,0 +1,179 @@
+import bisect
+import threading
+import time
+from datetime import timedelta
+
+from logic.utils import (
+    LEADERBOARD_PAGE_SIZE, rank_rows, get_leaderboard_page, get_user_rank,
+    get_leaderboard_around, get_database_time, get_scores_changed_since,
+)
+
+CACHE_TTL = 30        # Seconds a snapshot is served before asking the database for changes
+REFRESH_OVERLAP = 5   # Seconds re-read before the watermark, for transactions that committed late
+AROUND_RADIUS = 5     # Rows shown above and below the player in "around me"
+CACHED_ROWS = 1000    # Top rows kept in memory; anything further down is read from the database
+RELOAD_THRESHOLD = 1000  # Changes above which the top rows are reloaded instead of patched
+
+
+# -----------------------------
+# Leaderboard Snapshot Cache
+# -----------------------------
+class LeaderboardCache:
+    """
+    Ranked in-memory copy of the top `max_rows` rows of the leaderboard, which is
+    what players page through. The first use reads just those rows (one index
+    range scan, never the whole table); after that, a snapshot older than `ttl`
+    seconds is refreshed by fetching only the users whose `updated_at` moved past
+    the watermark. Pages, ranks and "around me" inside the cached rows are answered
+    from memory; anything further down falls through to the indexed queries in logic.utils.
+    """
+    def __init__(self, db, ttl=CACHE_TTL, max_rows=CACHED_ROWS):
+        self.db = db
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._scores = {}       # username -> high_score, for the cached rows
+        self._order = []        # (-high_score, username), sorted: leaderboard order
+        self._complete = False  # True while the cached rows are the whole leaderboard
+        self._watermark = None  # Database time up to which changes are applied
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """
+        Bring the snapshot up to date if it is older than the TTL (or `force`).
+        If the database fails, the old snapshot keeps being served.
+        """
+        with self._lock:
+            if (not force and self._refreshed_at is not None
+                    and time.monotonic() - self._refreshed_at < self.ttl):
+                return
+            try:
+                if self._watermark is None:
+                    self._load()
+                else:
+                    changes = get_scores_changed_since(self.db, self._watermark - timedelta(seconds=REFRESH_OVERLAP))
+                    if len(changes) > RELOAD_THRESHOLD:
+                        self._load()  # Reading the top rows again beats patching them one by one
+                    else:
+                        for username, score, updated_at in changes:
+                            self._set_score(username, score)
+                            self._watermark = max(self._watermark, updated_at)
+            except Exception as e:
+                print("Failed to refresh leaderboard, showing cached scores:", e)
+                if self._refreshed_at is None:
+                    raise
+                return
+            self._refreshed_at = time.monotonic()
+
+    def _load(self):
+        """
+        Replace the snapshot with the current top rows.
+        """
+        # Read the clock first: a change committed meanwhile is applied again by the next refresh, never missed
+        watermark = get_database_time(self.db)
+        rows = get_leaderboard_page(self.db, None, self.max_rows)
+        self._scores = {username: score for _, username, score in rows}
+        self._order = [(-score, username) for _, username, score in rows]
+        self._complete = len(rows) < self.max_rows
+        self._watermark = watermark
+
+    def apply_score(self, username, score):
+        """
+        Apply a score this process has just recorded (and is writing to the database),
+        so it is shown before the next refresh reads it back.
+        """
+        with self._lock:
+            if self._watermark is not None:
+                self._set_score(username, score)
+
+    def _set_score(self, username, score):
+        """
+        Apply one user's new score, keeping the cached rows exactly the top of the leaderboard.
+        """
+        key = (-score, username)
+        old_score = self._scores.get(username)
+        if old_score == score:
+            return
+        if old_score is not None:
+            del self._order[bisect.bisect_left(self._order, (-old_score, username))]
+            del self._scores[username]
+        # Rows past the last cached one are unknown, so only rows that sort before it can be placed
+        if self._complete or (self._order and key < self._order[-1]):
+            bisect.insort(self._order, key)
+            self._scores[username] = score
+        if len(self._order) > self.max_rows:
+            _, dropped = self._order.pop()
+            del self._scores[dropped]
+            self._complete = False
+
+    def _rank_at(self, position):
+        """
+        Rank of the row at `position`: 1 + the number of better scores.
+        """
+        return bisect.bisect_left(self._order, (self._order[position][0],)) + 1
+
+    def _rows(self, start, stop):
+        start = max(start, 0)
+        rows = [(username, -key) for key, username in self._order[start:stop]]
+        if not rows:
+            return []
+        return rank_rows(rows, start, self._rank_at(start))
+
+    def _covers(self, stop):
+        """
+        True if the rows up to position `stop` are all cached.
+        """
+        return self._complete or stop <= len(self._order)
+
+    # -----------------------------
+    # Queries (served from memory near the top)
+    # -----------------------------
+    def page(self, after=None, limit=LEADERBOARD_PAGE_SIZE):
+        """
+        Same result as logic.utils.get_leaderboard_page.
+        """
+        self.refresh()
+        with self._lock:
+            start = 0
+            if after is not None:
+                start = bisect.bisect_right(self._order, (-after[0], after[1]))
+            if self._covers(start + limit):
+                return self._rows(start, start + limit)
+        return get_leaderboard_page(self.db, after, limit)
+
+    def top(self, n=10):
+        """
+        The best `n` rows, [(rank, username, high_score)].
+        """
+        return self.page(None, n)
+
+    def around(self, username, radius=AROUND_RADIUS):
+        """
+        The user's row with up to `radius` rows on each side, or [] for an unknown user.
+        """
+        self.refresh()
+        with self._lock:
+            score = self._scores.get(username)
+            if score is not None:
+                position = bisect.bisect_left(self._order, (-score, username))
+                if self._covers(position + radius + 1):
+                    return self._rows(position - radius, position + radius + 1)
+            elif self._complete:
+                return []
+        return get_leaderboard_around(self.db, username, radius)
+
+    def rank(self, username):
+        """
+        The user's (rank, high_score), or None if unknown.
+        """
+        self.refresh()
+        with self._lock:
+            score = self._scores.get(username)
+            if score is not None:
+                return bisect.bisect_left(self._order, (-score,)) + 1, score
+            if self._complete:
+                return None
+        return get_user_rank(self.db, username)
+
+    def __len__(self):
+        return len(self._order)
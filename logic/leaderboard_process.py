@@ -0,0 +1,161 @@
+import multiprocessing
+import threading
+
+from logic.utils import LEADERBOARD_PAGE_SIZE
+
+# -----------------------------
+# Leaderboard Process
+# -----------------------------
+# Kivy cannot draw in the game's process once pygame has run there (pygame's SDL
+# leaves no GL context current for Kivy's window), so the leaderboard lives in a
+# process of its own. That process is started together with the game: it imports
+# Kivy and creates its window hidden while the player plays. When the game ends
+# it is handed the rows the game's Storage already holds and shows them at once.
+# Later pages are asked for over the pipe and served from the game's Storage, so
+# the leaderboard opens no database connection of its own.
+#
+# Messages on the pipe:
+#   game -> leaderboard   ("show", page_size, rows)   show the leaderboard, starting with `rows`
+#                         ("quit",)                   exit without showing anything
+#                         result                      the answer to a request
+#   leaderboard -> game   ("page", after, limit)      a leaderboard page (Storage.get_leaderboard_page)
+#                         ("rank", username)          a player's place (Storage.get_user_rank)
+#                         ("closed",)                 the player closed the leaderboard
+
+
+class LeaderboardProcess:
+    """
+    Game side of the leaderboard process. `target(connection, username)` is the
+    process's entry point (main.run_leaderboard), which should call wait_for_show.
+    """
+    def __init__(self, target, username, page_size=LEADERBOARD_PAGE_SIZE):
+        context = multiprocessing.get_context("spawn")
+        self.username = username
+        self.page_size = page_size
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(target=target, args=(child_connection, username), name="Leaderboard")
+        self._child_connection = child_connection
+        self._prefetcher = None
+
+    def start(self, storage):
+        """
+        Start the process, and load the leaderboard rows of `storage` (a logic.storage.Storage)
+        in the background so they are in memory by the time the game ends.
+        """
+        self._process.start()
+        self._child_connection.close()  # Only the child holds it now, so recv() sees it exit
+        self._prefetcher = threading.Thread(target=self._prefetch, args=(storage,),
+                                            name="LeaderboardPrefetch", daemon=True)
+        self._prefetcher.start()
+
+    def _prefetch(self, storage):
+        storage.wait_for_connection()
+        try:
+            storage.get_leaderboard_page(None, self.page_size)
+        except Exception as e:
+            print("Failed to preload the leaderboard:", e)
+
+    def show(self, storage):
+        """
+        Show the leaderboard with the scores of `storage` and serve the pages it asks
+        for. Returns when the player closes it.
+        """
+        try:
+            rows = storage.get_leaderboard_page(None, self.page_size)
+        except Exception as e:
+            print("Error fetching scores:", e)
+            rows = []
+
+        try:
+            self._connection.send(("show", self.page_size, rows))
+            while True:
+                message = self._connection.recv()
+                if message[0] == "closed":
+                    break
+                try:
+                    if message[0] == "page":
+                        result = storage.get_leaderboard_page(message[1], message[2])
+                    else:
+                        result = storage.get_user_rank(message[1])
+                except Exception as e:
+                    print("Error fetching scores:", e)
+                    result = [] if message[0] == "page" else None
+                self._connection.send(result)
+        except (EOFError, OSError) as e:
+            print("The leaderboard process exited:", e)
+
+    def close(self, timeout=5):
+        """
+        Tell a process that is still waiting (the game was quit) to exit, and wait for it.
+        """
+        if self._process.is_alive():
+            try:
+                self._connection.send(("quit",))
+            except OSError:
+                pass  # Already exiting
+            self._process.join(timeout)
+            if self._process.is_alive():
+                print("The leaderboard process did not exit, terminating it.")
+                self._process.terminate()
+                self._process.join()
+        if self._prefetcher is not None:
+            self._prefetcher.join(timeout)
+        self._connection.close()
+
+
+# -----------------------------
+# Leaderboard Side
+# -----------------------------
+class RemoteScores:
+    """
+    Stands in for logic.storage.Storage in the leaderboard process. The first page
+    is the one the game handed over; everything else is asked for over the pipe.
+    """
+    def __init__(self, connection, page_size, rows):
+        self._connection = connection
+        self._page_size = page_size
+        self._first_page = rows
+        self._lock = threading.Lock()
+
+    def _request(self, *message):
+        with self._lock:
+            self._connection.send(message)
+            return self._connection.recv()
+
+    def get_leaderboard_page(self, after=None, limit=LEADERBOARD_PAGE_SIZE):
+        """
+        Same result as logic.storage.Storage.get_leaderboard_page.
+        """
+        if after is None and limit <= self._page_size:
+            return self._first_page[:limit]
+        return self._request("page", after, limit)
+
+    def get_user_rank(self, username):
+        """
+        Same result as logic.storage.Storage.get_user_rank.
+        """
+        return self._request("rank", username)
+
+    def close(self):
+        """
+        Tell the game the leaderboard was closed.
+        """
+        try:
+            self._connection.send(("closed",))
+        except OSError:
+            pass  # The game is gone already
+
+
+def wait_for_show(connection):
+    """
+    Block until the game ends. Returns the RemoteScores to show, or None if the
+    leaderboard is not wanted (the game was quit, or its process is gone).
+    """
+    try:
+        message = connection.recv()
+    except EOFError:
+        return None
+    if message[0] != "show":
+        return None
+    _, page_size, rows = message
+    return RemoteScores(connection, page_size, rows)
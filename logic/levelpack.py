@@ -0,0 +1,343 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+from logic.levels import Level, LevelRegistry, DEFAULT_EXIT, DEFAULT_SPAWN
+
+# -----------------------------
+# Level Pack Format
+# -----------------------------
+# A level pack is a little-endian binary file:
+#
+#   header   "<4sHHI"  magic b"LVPK", format version, reserved, level count
+#   index    "<IIH"    one entry per level, sorted by level number:
+#                      level number, byte offset of its record, wall count
+#   records  "<6h"     exit (x, y, w, h) and spawn (x, y)
+#            "<4h"     followed by one (x, y, w, h) per wall
+#
+# Only the header is read when a pack is opened. Index entries are binary
+# searched in place and a level's record is decoded the first time it is asked for.
+
+PACK_MAGIC = b"LVPK"
+PACK_VERSION = 1
+
+HEADER = struct.Struct("<4sHHI")
+INDEX_ENTRY = struct.Struct("<IIH")
+LEVEL_HEADER = struct.Struct("<6h")
+WALL = struct.Struct("<4h")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOURCE_PATH = os.path.join(PROJECT_DIR, "levels", "default.json")
+DEFAULT_PACK_PATH = os.path.join(PROJECT_DIR, "assets", "levels.pack")
+
+
+# Value ranges the pack format can hold
+# Level numbers end up in Postgres INTEGER columns (high scores, replays), and so
+# does the number after the last level, which the game moves on to when it is done
+MAX_LEVEL_NUMBER = 0x7FFFFFFE
+MAX_WALLS = 0xFFFF             # "<H" in the index
+MIN_COORDINATE, MAX_COORDINATE = -0x8000, 0x7FFF  # "<h" in the records
+
+
+def _check_values(label, name, value, count, sized):
+    """
+    `value` as a tuple of `count` whole numbers the pack can hold; `sized`
+    values end with a width and height, which must be positive.
+    Raises ValueError starting with `label` (the level) otherwise.
+    """
+    if not isinstance(value, (list, tuple)) or len(value) != count or \
+            not all(isinstance(v, int) and not isinstance(v, bool) for v in value):
+        shape = "[x, y, width, height]" if sized else "[x, y]"
+        raise ValueError(f"{label}: {name} {value!r} must be {shape} in whole numbers.")
+    for v in value:
+        if not MIN_COORDINATE <= v <= MAX_COORDINATE:
+            raise ValueError(f"{label}: {name} {list(value)} is outside {MIN_COORDINATE}..{MAX_COORDINATE}.")
+    if sized and (value[2] <= 0 or value[3] <= 0):
+        raise ValueError(f"{label}: {name} {list(value)} needs a positive width and height.")
+    return tuple(value)
+
+
+def load_level_source(path):
+    """
+    Read a JSON level source file and return a list of Level tuples.
+
+    Format:
+        {"defaults": {"exit": [x, y, w, h], "spawn": [x, y]},
+         "levels": [{"number": 1, "walls": [[x, y, w, h], ...], "exit": ..., "spawn": ...}]}
+    "exit" and "spawn" are optional per level and fall back to "defaults".
+    Raises ValueError, naming the level, for anything a level pack cannot hold.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            source = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}")
+
+    if not isinstance(source, dict) or not isinstance(source.get("levels"), list) or not source["levels"]:
+        raise ValueError(f"{path} needs a non-empty \"levels\" list.")
+    defaults = source.get("defaults", {})
+    if not isinstance(defaults, dict):
+        raise ValueError(f"{path}: \"defaults\" must be an object.")
+    default_exit = _check_values("Defaults", "exit", defaults.get("exit", DEFAULT_EXIT), 4, True)
+    default_spawn = _check_values("Defaults", "spawn", defaults.get("spawn", DEFAULT_SPAWN), 2, False)
+
+    levels = []
+    numbers = set()
+    for position, entry in enumerate(source["levels"], 1):
+        number = entry.get("number") if isinstance(entry, dict) else None
+        if not isinstance(number, int) or isinstance(number, bool):
+            raise ValueError(f"Level entry {position} in {path} needs a whole \"number\".")
+        label = f"Level {number}"
+        if not 1 <= number <= MAX_LEVEL_NUMBER:
+            raise ValueError(f"{label}: the number must be in 1..{MAX_LEVEL_NUMBER}.")
+        if number in numbers:
+            raise ValueError(f"{label} is defined twice.")
+        numbers.add(number)
+
+        walls = entry.get("walls", [])
+        if not isinstance(walls, list) or len(walls) > MAX_WALLS:
+            raise ValueError(f"{label}: \"walls\" must be a list of at most {MAX_WALLS} walls.")
+        levels.append(Level(
+            number,
+            tuple(_check_values(label, "wall", wall, 4, True) for wall in walls),
+            _check_values(label, "exit", entry.get("exit", default_exit), 4, True),
+            _check_values(label, "spawn", entry.get("spawn", default_spawn), 2, False),
+        ))
+    return levels
+
+
+def build_level_pack(levels):
+    """
+    Encode an iterable of Level tuples into level pack bytes.
+    """
+    levels = sorted(levels, key=lambda level: level.number)
+    numbers = [level.number for level in levels]
+    if not numbers:
+        raise ValueError("A level pack needs at least one level.")
+    if len(set(numbers)) != len(numbers):
+        raise ValueError("Level numbers in a pack must be unique.")
+
+    records = []
+    offset = HEADER.size + INDEX_ENTRY.size * len(levels)
+    index = bytearray()
+    for level in levels:
+        record = bytearray(LEVEL_HEADER.pack(*level.exit, *level.spawn))
+        for wall in level.walls:
+            record += WALL.pack(*wall)
+        index += INDEX_ENTRY.pack(level.number, offset, len(level.walls))
+        records.append(bytes(record))
+        offset += len(record)
+
+    return HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(levels)) + bytes(index) + b"".join(records)
+
+
+def write_level_pack(path, data):
+    """
+    Write level pack bytes to `path`. The file is replaced atomically, so a
+    running game (or grader worker) never maps a half-written pack.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def compile_level_source(source_path, pack_path):
+    """
+    Compile a JSON level source file into a binary level pack.
+    Returns the number of levels written.
+    """
+    levels = load_level_source(source_path)
+    write_level_pack(pack_path, build_level_pack(levels))
+    return len(levels)
+
+
+def is_stale(path=DEFAULT_PACK_PATH, source_path=DEFAULT_SOURCE_PATH):
+    """
+    True if the pack is missing or older than its JSON source.
+    A pack without a source (shipped on its own) is never stale.
+    """
+    try:
+        source_time = os.path.getmtime(source_path)
+    except OSError:
+        return False
+    try:
+        return os.path.getmtime(path) < source_time
+    except OSError:
+        return True
+
+
+# -----------------------------
+# Lazy, Memory-Mapped Registry
+# -----------------------------
+class LevelPack:
+    """
+    Read-only level registry backed by a memory-mapped level pack.
+    Offers the same lookup API as logic.levels.LevelRegistry.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Level pack {path} is empty.")
+
+        magic, version, _, count = HEADER.unpack_from(self._data, 0)
+        if magic != PACK_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a level pack.")
+        if version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported level pack version {version} in {path}.")
+        if count == 0:
+            self.close()
+            raise ValueError(f"Level pack {path} has no levels.")
+
+        self._count = count
+        self._levels = {}  # level number -> decoded Level
+
+    def _index_entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._data, HEADER.size + position * INDEX_ENTRY.size)
+
+    def _find(self, number):
+        low, high = 0, self._count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            entry = self._index_entry(middle)
+            if entry[0] == number:
+                return entry
+            if entry[0] < number:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def get(self, number):
+        """
+        Returns the Level with this number, decoding it on first access, or None.
+        """
+        level = self._levels.get(number)
+        if level is not None:
+            return level
+
+        entry = self._find(number)
+        if entry is None:
+            return None
+
+        _, offset, wall_count = entry
+        header = LEVEL_HEADER.unpack_from(self._data, offset)
+        walls_start = offset + LEVEL_HEADER.size
+        walls = tuple(
+            WALL.unpack_from(self._data, walls_start + i * WALL.size) for i in range(wall_count)
+        )
+        level = Level(number, walls, header[:4], header[4:])
+        self._levels[number] = level
+        return level
+
+    def numbers(self):
+        return tuple(self._index_entry(position)[0] for position in range(self._count))
+
+    def first_number(self):
+        return self._index_entry(0)[0] if self._count else 0
+
+    def last_number(self):
+        return self._index_entry(self._count - 1)[0] if self._count else 0
+
+    def next_number(self, number):
+        """
+        The first level number after `number` (numbers may have gaps);
+        last_number() + 1 once there is no level left.
+        """
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_entry(middle)[0] <= number:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            return self._index_entry(low)[0]
+        return self.last_number() + 1
+
+    def __contains__(self, number):
+        return number in self._levels or self._find(number) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (self.get(number) for number in self.numbers())
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+
+def open_level_registry(path=DEFAULT_PACK_PATH, source_path=DEFAULT_SOURCE_PATH):
+    """
+    Open the level pack at `path`, compiling it from `source_path` first if it
+    is missing or older than the source. If the pack cannot be written or read,
+    the levels are loaded from the source into memory instead. An invalid source
+    is reported and the previous pack, if any, is used.
+    Raises ValueError if there are no levels to play at all.
+    """
+    levels = None
+    source_error = None
+    if is_stale(path, source_path):
+        try:
+            levels = load_level_source(source_path)
+        except (OSError, ValueError) as e:
+            source_error = e
+            print(f"Failed to load levels from {source_path}: {e}")
+        else:
+            try:
+                write_level_pack(path, build_level_pack(levels))
+                print(f"Rebuilt level pack {path}")
+            except OSError as e:
+                # Read-only install: use the levels from the source this time
+                print(f"Failed to write level pack {path}: {e}")
+                return LevelRegistry(levels)
+    if os.path.exists(path):
+        try:
+            registry = LevelPack(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Failed to open level pack {path}: {e}")
+        else:
+            if source_error is not None:
+                print(f"Using the previous level pack {path}")
+            return registry
+
+    if levels is None and source_error is None:
+        try:
+            levels = load_level_source(source_path)
+        except (OSError, ValueError) as e:
+            source_error = e
+    if levels is None:
+        raise ValueError(f"No levels to play: {source_error}")
+    return LevelRegistry(levels)
+
+
+# -----------------------------
+# Command Line
+# -----------------------------
+if __name__ == '__main__':
+    # python -m logic.levelpack [levels.json] [levels.pack]
+    if len(sys.argv) > 3:
+        print("Usage: python -m logic.levelpack [levels.json] [levels.pack]")
+        sys.exit(1)
+    source_path = sys.argv[1] if len(sys.argv) >= 2 else DEFAULT_SOURCE_PATH
+    output_path = sys.argv[2] if len(sys.argv) == 3 else DEFAULT_PACK_PATH
+    try:
+        written = compile_level_source(source_path, output_path)
+    except (OSError, ValueError) as e:
+        print(f"Failed to compile {source_path}: {e}")
+        sys.exit(1)
+    print(f"Wrote {written} levels to {output_path}")
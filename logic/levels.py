@@ -0,0 +1,66 @@
+import bisect
+from collections import namedtuple
+
+# -----------------------------
+# Level Data
+# -----------------------------
+# The levels themselves live in levels/default.json, the one source of level
+# data; logic/levelpack.py compiles it into assets/levels.pack and loads it.
+# Rectangles are plain (x, y, width, height) tuples so the registry can be used
+# without pygame (headless code, tools). The coordinate system is pygame's:
+# (0, 0) is the top-left corner of the 800x600 screen.
+
+# Player spawns in the bottom-left corner: (0, SCREEN_HEIGHT - PLAYER_SIZE)
+DEFAULT_SPAWN = (0, 570)
+# Exit is the 100x100 top-right corner of the screen
+DEFAULT_EXIT = (700, 0, 100, 100)
+
+# An immutable, precomputed level: walls and exit are (x, y, w, h) tuples, spawn is (x, y)
+Level = namedtuple("Level", ["number", "walls", "exit", "spawn"])
+
+
+# -----------------------------
+# Level Registry
+# -----------------------------
+class LevelRegistry:
+    """
+    Read-only collection of levels, built once and looked up by level number.
+    """
+    def __init__(self, levels):
+        self._levels = {level.number: level for level in levels}
+        self._numbers = tuple(sorted(self._levels))
+
+    def get(self, number):
+        """
+        Returns the Level with this number, or None if there is no such level.
+        """
+        return self._levels.get(number)
+
+    def numbers(self):
+        return self._numbers
+
+    def first_number(self):
+        return self._numbers[0] if self._numbers else 0
+
+    def last_number(self):
+        return self._numbers[-1] if self._numbers else 0
+
+    def next_number(self, number):
+        """
+        The first level number after `number` (numbers may have gaps);
+        last_number() + 1 once there is no level left.
+        """
+        position = bisect.bisect_right(self._numbers, number)
+        if position < len(self._numbers):
+            return self._numbers[position]
+        return self.last_number() + 1
+
+    def __contains__(self, number):
+        return number in self._levels
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __iter__(self):
+        return (self._levels[number] for number in self._numbers)
+
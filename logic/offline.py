@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+
+from logic.score_queue import LOCAL_DATA_DIR
+
+DEFAULT_OFFLINE_PATH = os.path.join(LOCAL_DATA_DIR, "offline.sqlite3")
+# Pending scores were kept in this JSON file before they moved into the store
+LEGACY_JOURNAL_PATH = os.path.join(LOCAL_DATA_DIR, "score_journal.json")
+
+PASSWORD_HASH_ITERATIONS = 100000
+SALT_BYTES = 16
+
+
+def hash_password(password, salt):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PASSWORD_HASH_ITERATIONS)
+
+
+# -----------------------------
+# Local SQLite Mirror of `users`
+# -----------------------------
+class OfflineStore:
+    """
+    Local SQLite copy of the users this machine has seen: a salted password hash
+    (never the password) so they can log in without the server, and their high
+    score. Scores earned offline are marked dirty until they are synced to Postgres.
+    """
+    def __init__(self, path=DEFAULT_OFFLINE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                password_hash BLOB,
+                salt BLOB,
+                high_score INTEGER NOT NULL DEFAULT 0,
+                dirty INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+
+    def remember_login(self, username, password):
+        """
+        Cache a salted hash of credentials that the server has just accepted.
+        """
+        salt = os.urandom(SALT_BYTES)
+        password_hash = hash_password(password, salt)
+        with self._lock, self._conn:
+            self._conn.execute("""
+            INSERT INTO users (username, password_hash, salt) VALUES (?, ?, ?)
+            ON CONFLICT (username) DO UPDATE SET password_hash = excluded.password_hash, salt = excluded.salt
+            """, (username, password_hash, salt))
+
+    def authenticate(self, username, password):
+        """
+        Check credentials against the cached hash.
+        Returns the username on success, or None (also for users never seen online).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT password_hash, salt FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            print("User is not cached on this computer. Log in once while online.")
+            return None
+        if hmac.compare_digest(row[0], hash_password(password, row[1])):
+            print("Offline login successful!")
+            return username
+        print("Invalid username or password.")
+        return None
+
+    def get_high_score(self, username):
+        with self._lock:
+            row = self._conn.execute("SELECT high_score FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else 0
+
+    def record_high_score(self, username, score):
+        """
+        Raise the cached high score and mark it dirty so the next sync pushes it.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("""
+            INSERT INTO users (username, high_score, dirty) VALUES (?, ?, 1)
+            ON CONFLICT (username) DO UPDATE SET high_score = excluded.high_score, dirty = 1
+            WHERE excluded.high_score > users.high_score
+            """, (username, score))
+
+    def mirror_scores(self, scores):
+        """
+        Merge high scores fetched from the server: {username: high_score}.
+        A cached score is only ever raised, so offline progress is kept.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany("""
+            INSERT INTO users (username, high_score) VALUES (?, ?)
+            ON CONFLICT (username) DO UPDATE SET high_score = excluded.high_score
+            WHERE excluded.high_score > users.high_score
+            """, [(username, score or 0) for username, score in scores.items()])
+
+    def dirty_scores(self):
+        """
+        Returns [(username, high_score)] earned offline and not yet synced.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT username, high_score FROM users WHERE dirty = 1 ORDER BY username"
+            ).fetchall()
+
+    def mark_synced(self, scores):
+        """
+        Clear the dirty flag for (username, high_score) pairs that reached the server,
+        unless the score went up again in the meantime.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE users SET dirty = 0 WHERE username = ? AND high_score <= ?", scores
+            )
+
+    def import_journal(self, path=LEGACY_JOURNAL_PATH):
+        """
+        Move the scores of an old score journal ({username: score}) into the store
+        as dirty scores, then delete the journal.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                journal = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print("Ignoring unreadable score journal:", e)
+            return
+        for username, score in journal.items():
+            self.record_high_score(username, int(score))
+        try:
+            os.remove(path)
+        except OSError as e:
+            print("Failed to remove score journal:", e)
+        print(f"Imported {len(journal)} score(s) from {path}")
+
+    def all_scores(self):
+        """
+        Returns {username: high_score} for every cached user.
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT username, high_score FROM users").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
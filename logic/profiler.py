@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import time
+from collections import deque
+
+import pygame
+
+from logic.textinput import GlyphCache
+
+FRAME = "frame"         # Time from one frame's start to the next (what the player sees)
+BUSY = "busy"           # Time spent working inside a frame, without the wait for the next tick
+WINDOW = 600            # Frames kept for the rolling percentiles (10 s at 60 FPS)
+TRACE_LIMIT = 200000    # Trace events kept for export; the oldest are dropped first
+PERCENTILES = (50, 95, 99)
+HUD_REFRESH_MS = 500
+
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+# -----------------------------
+# Frame Profiler
+# -----------------------------
+class FrameProfiler:
+    """
+    Named timing spans around the phases of a frame:
+
+        profiler.begin_frame()
+        with profiler.span("redraw"):
+            redraw()
+        profiler.end_frame()
+
+    Keeps the last WINDOW samples of every span (plus whole frames) for rolling
+    p50/p95/p99, and the raw spans for a Chrome trace (chrome://tracing, Perfetto).
+    When disabled every call is a no-op.
+    """
+    def __init__(self, enabled=True, window=WINDOW, trace_limit=TRACE_LIMIT):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # span name -> deque of durations in ms
+        self.trace = deque(maxlen=trace_limit)  # (name, start_ns, end_ns)
+        self.frames = 0
+        self._origin = time.perf_counter_ns()
+        self._frame_start = None
+
+    def span(self, name):
+        """
+        Context manager timing the enclosed block under `name`.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start_ns, end_ns):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append((end_ns - start_ns) / 1e6)
+        self.trace.append((name, start_ns, end_ns))
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if self._frame_start is not None:
+            self.record(FRAME, self._frame_start, now)
+        self._frame_start = now
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        self.record(BUSY, self._frame_start, time.perf_counter_ns())
+        self.frames += 1
+
+    def stats(self):
+        """
+        Returns {span name: {"p50": ms, "p95": ms, "p99": ms, "max": ms, "count": n}}
+        over the rolling window.
+        """
+        stats = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            entry = {f"p{p}": round(percentile(ordered, p), 3) for p in PERCENTILES}
+            entry["max"] = round(ordered[-1], 3) if ordered else 0.0
+            entry["count"] = len(ordered)
+            stats[name] = entry
+        return stats
+
+    def summary(self):
+        """
+        A few printable lines: whole frames first, then spans by their p95.
+        """
+        stats = self.stats()
+        names = [name for name in (FRAME, BUSY) if name in stats]
+        names += sorted((name for name in stats if name not in (FRAME, BUSY)),
+                        key=lambda name: stats[name]["p95"], reverse=True)
+        return [f"{name:>15}: p50 {stats[name]['p50']:7.2f}  p95 {stats[name]['p95']:7.2f}  "
+                f"p99 {stats[name]['p99']:7.2f}  max {stats[name]['max']:7.2f} ms" for name in names]
+
+    def export_chrome_trace(self, path):
+        """
+        Write the recorded spans as a Chrome trace JSON file. Returns the number of events.
+        """
+        pid = os.getpid()
+        events = [{
+            "name": name, "cat": "frame" if name in (FRAME, BUSY) else "span", "ph": "X",
+            "ts": (start - self._origin) / 1000, "dur": (end - start) / 1000,
+            "pid": pid, "tid": 1 if name == FRAME else 0,
+        } for name, start, end in self.trace]
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 1, "args": {"name": "frames"}})
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "game loop"}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+# -----------------------------
+# On-Screen HUD
+# -----------------------------
+class ProfilerHUD:
+    """
+    Small box with the profiler's rolling percentiles, drawn as a LevelRenderer overlay.
+    Refreshed every HUD_REFRESH_MS so it costs almost nothing between refreshes.
+    """
+    def __init__(self, profiler, pos=(10, 40), lines=6, font=None):
+        self.profiler = profiler
+        self.active = False
+        self.lines = lines
+        self.glyphs = GlyphCache(font or pygame.font.Font(None, 20), (255, 255, 0))
+        self.rect = pygame.Rect(pos, (430, self.glyphs.height * lines + 8))
+        self._drawn_at = None
+
+    def toggle(self):
+        self.active = not self.active
+        self._drawn_at = None
+
+    def needs_redraw(self):
+        return self.active and (self._drawn_at is None
+                                or pygame.time.get_ticks() - self._drawn_at >= HUD_REFRESH_MS)
+
+    def draw(self, surface):
+        pygame.draw.rect(surface, (0, 0, 0), self.rect)
+        y = self.rect.y + 4
+        for line in self.profiler.summary()[:self.lines]:
+            self.glyphs.draw(surface, line, (self.rect.x + 4, y))
+            y += self.glyphs.height
+        self._drawn_at = pygame.time.get_ticks()
+        return self.rect
@@ -0,0 +1,224 @@
+from collections import OrderedDict, namedtuple
+
+import pygame
+
+# -----------------------------
+# Scaled Texture Cache
+# -----------------------------
+class TextureCache:
+    """
+    Bounded LRU cache of scaled textures keyed by (texture, size).
+    Scaling a surface allocates a new one, so the game fills this cache
+    when a level loads and the per-frame redraw only has to blit.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (id(texture), size) -> (texture, scaled)
+
+    def get(self, texture, size):
+        """
+        Return `texture` scaled to `size`, scaling it on a miss.
+        """
+        size = (int(size[0]), int(size[1]))
+        key = (id(texture), size)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        scaled = pygame.transform.scale(texture, size)
+        # Keep a reference to the source texture so its id() cannot be reused
+        self._entries[key] = (texture, scaled)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return scaled
+
+    def preload(self, texture, sizes):
+        """
+        Scale `texture` to every size in `sizes` ahead of time.
+        """
+        for size in sizes:
+            self.get(texture, size)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the current number of cached surfaces.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+# -----------------------------
+# Cached Text Rendering
+# -----------------------------
+class TextRenderer:
+    """
+    Loads each font once and keeps rendered text in a bounded LRU cache keyed by
+    (font, text, color), so labels that rarely change (the level number, HUD
+    counters) cost a blit per frame instead of a font lookup and a render.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fonts = {}  # (name, size) -> Font
+        self._entries = OrderedDict()  # (name, size, text, color, antialias) -> Surface
+
+    def font(self, size, name=None):
+        """
+        The font `name` (a system font name, or None for pygame's default) at `size`, loaded on first use.
+        """
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            # Font(None, ...) is what SysFont(None, ...) ends up loading, without the system font scan
+            font = pygame.font.Font(None, size) if name is None else pygame.font.SysFont(name, size)
+            self._fonts[key] = font
+        return font
+
+    def render(self, text, size, color=(255, 255, 255), name=None, antialias=True):
+        """
+        `text` rendered in the font (name, size) and `color`, rendering it on a miss.
+        The surface is shared; blit it, do not draw on it.
+        """
+        key = (name, size, text, tuple(color), antialias)
+        surface = self._entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.font(size, name).render(text, antialias, color)
+        self._entries[key] = surface
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the hit/miss counters, the cached surfaces and the loaded fonts.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "fonts": len(self._fonts)}
+
+
+# -----------------------------
+# Level Rendering
+# -----------------------------
+# The textures a level is drawn with. Walls and the exit are scaled to each rect
+# through the TextureCache; background and player are used as they are.
+LevelTextures = namedtuple("LevelTextures", ["background", "wall", "exit", "player"])
+
+
+class LevelRenderer:
+    """
+    Draws the game's frames: a level (a logic.rules.LevelGeometry), its label,
+    the player and overlays. With `dirty_rects` the background, walls, exit and
+    label are baked into one surface per level, and after the first full frame
+    only the old and new player rectangles (and overlays such as the text input,
+    when they change) are restored and pushed to the display. Without it every
+    frame repaints and flips the whole screen.
+    """
+    def __init__(self, screen, texture_cache, textures, dirty_rects=True):
+        self.screen = screen
+        self.texture_cache = texture_cache
+        self.textures = textures
+        self.dirty_rects = dirty_rects
+        self.layer = None
+        self.geometry = None  # The LevelGeometry the layer was baked from
+        self._last_player_rect = None
+        self._overlay_rects = {}  # overlay -> where it was drawn, while it is shown
+
+    def redraw(self, geometry, label_surface, player_rect, overlays=()):
+        """
+        Draw one frame. The layer is baked again whenever `geometry` is another
+        object than last time, so it always shows the walls the rules collide with.
+        """
+        if not self.dirty_rects:
+            self.draw_full(geometry, label_surface, player_rect, overlays)
+            return
+        if geometry is not self.geometry:
+            self.bake(geometry, label_surface)
+        self.draw(player_rect, overlays)
+
+    def _draw_level(self, surface, geometry):
+        textures = self.textures
+        surface.blit(textures.background, (0, 0))
+        for wall in geometry.walls:
+            surface.blit(self.texture_cache.get(textures.wall, wall.size), (wall.x, wall.y))
+
+    def _draw_exit(self, surface, geometry):
+        exit_rect = geometry.exit
+        surface.blit(self.texture_cache.get(self.textures.exit, exit_rect.size), (exit_rect.x, exit_rect.y))
+
+    def bake(self, geometry, label_surface):
+        """
+        Build the static layer for a level. The next draw() repaints the whole screen.
+        """
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        self._draw_level(layer, geometry)
+        self._draw_exit(layer, geometry)
+        layer.blit(label_surface, (10, 10))
+
+        self.layer = layer
+        self.geometry = geometry
+        self._last_player_rect = None
+
+    def draw_full(self, geometry, label_surface, player_rect, overlays=()):
+        """
+        Repaint the whole screen (level, player, exit, label, active overlays) and flip it.
+        """
+        self._draw_level(self.screen, geometry)
+        self.screen.blit(self.textures.player, (player_rect.x, player_rect.y))
+        self._draw_exit(self.screen, geometry)
+        self.screen.blit(label_surface, (10, 10))
+        for overlay in overlays:
+            if overlay.active:
+                overlay.draw(self.screen)
+        pygame.display.flip()
+
+    def draw(self, player_rect, overlays=()):
+        """
+        Draw the player over the baked level, and on top of both every active overlay
+        (objects with `active`, `rect`, `needs_redraw()` and `draw(surface)`,
+        e.g. logic.textinput.TextInput). Overlays must paint their whole rect.
+        """
+        player_texture = self.textures.player
+        player_rect = pygame.Rect(player_rect)
+        old_rect = self._last_player_rect
+        shown = [overlay for overlay in overlays if overlay.active]
+
+        if old_rect is None:
+            self.screen.blit(self.layer, (0, 0))
+            self.screen.blit(player_texture, (player_rect.x, player_rect.y))
+            self._overlay_rects = {overlay: overlay.draw(self.screen) for overlay in shown}
+            pygame.display.flip()
+        else:
+            screen_rect = self.screen.get_rect()
+            dirty = [old_rect.clip(screen_rect), player_rect.clip(screen_rect)]
+            # Restore the static layer under the old sprite (and closed overlays),
+            # then draw the sprite at its new spot
+            self.screen.blit(self.layer, (old_rect.x, old_rect.y), old_rect)
+            for overlay, rect in list(self._overlay_rects.items()):
+                if overlay not in shown:
+                    self.screen.blit(self.layer, rect.topleft, rect)
+                    dirty.append(rect)
+                    del self._overlay_rects[overlay]
+            self.screen.blit(player_texture, (player_rect.x, player_rect.y))
+            for overlay in shown:
+                if (overlay not in self._overlay_rects or overlay.needs_redraw()
+                        or overlay.rect.colliderect(old_rect) or overlay.rect.colliderect(player_rect)):
+                    self._overlay_rects[overlay] = overlay.draw(self.screen)
+                    dirty.append(self._overlay_rects[overlay])
+            pygame.display.update(dirty)
+
+        self._last_player_rect = player_rect
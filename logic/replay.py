@@ -0,0 +1,425 @@
+import argparse
+import os
+import struct
+import time
+from collections import namedtuple
+
+from logic.expressions import compile_user_function
+from logic.rules import (
+    PLAYER_SIZE, LevelGeometry, PlayerBox, hits_wall, clamp_to_screen, push_out,
+    function_step, apply_step, reached_exit,
+)
+from logic.score_queue import LOCAL_DATA_DIR
+
+# -----------------------------
+# Replay Format
+# -----------------------------
+# A replay is everything needed to play a run_game session again: the game is
+# deterministic, so the level and start position plus each submitted function
+# and the frame it was entered on reproduce every frame. Little-endian binary:
+#
+#   header   "<4sHHIhhI"   magic b"RPLY", format version, FPS, start level,
+#                          start x, start y, frames played
+#            "<Ihh"        level, x and y at the end (to check a playback against)
+#            "<H"          username length, then the UTF-8 username
+#   inputs   "<I"          input count, then per input:
+#            "<IH"         frame index, text length, then the UTF-8 function text
+#
+# A level of ten attempts is a few hundred bytes, small enough to keep in the
+# database next to the high scores. Levels are "<I", like the level pack's index;
+# version 1 stored them as "<H" and is still read.
+
+REPLAY_MAGIC = b"RPLY"
+REPLAY_VERSION = 2
+
+HEADER = struct.Struct("<4sHHIhhI")
+END_STATE = struct.Struct("<Ihh")
+HEADER_V1 = struct.Struct("<4sHHHhhI")
+END_STATE_V1 = struct.Struct("<Hhh")
+PREFIX = struct.Struct("<4sH")  # Magic and version, the same in every version
+LENGTH = struct.Struct("<H")
+COUNT = struct.Struct("<I")
+INPUT = struct.Struct("<IH")
+
+# Replays are written here when a game ends and uploaded by Storage.sync()
+REPLAY_DIR = os.path.join(LOCAL_DATA_DIR, "replays")
+REPLAY_SUFFIX = ".replay"
+
+# `inputs` is a tuple of (frame, function text); `start` and `end` are (x, y)
+Replay = namedtuple("Replay", ["username", "fps", "start_level", "start", "frames", "end_level", "end", "inputs"])
+
+
+def _encode_text(text):
+    data = text.encode("utf-8")
+    if len(data) > 0xFFFF:
+        raise ValueError("Replay text is too long.")
+    return data
+
+
+def encode_replay(replay):
+    """
+    Encode a Replay into replay bytes. Raises ValueError for values the format cannot hold.
+    """
+    username = _encode_text(replay.username)
+    try:
+        data = bytearray(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, replay.fps, replay.start_level,
+                                     *replay.start, replay.frames))
+        data += END_STATE.pack(replay.end_level, *replay.end)
+    except struct.error as e:
+        raise ValueError(f"Cannot record this game: {e}")
+    data += LENGTH.pack(len(username)) + username
+    data += COUNT.pack(len(replay.inputs))
+    for frame, text in replay.inputs:
+        text = _encode_text(text)
+        data += INPUT.pack(frame, len(text)) + text
+    return bytes(data)
+
+
+def decode_replay(data):
+    """
+    Decode replay bytes into a Replay. Raises ValueError if they are not a valid replay.
+    """
+    try:
+        magic, version = PREFIX.unpack_from(data, 0)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("Data is not a replay.")
+        if version == REPLAY_VERSION:
+            header, end_state = HEADER, END_STATE
+        elif version == 1:
+            header, end_state = HEADER_V1, END_STATE_V1
+        else:
+            raise ValueError(f"Unsupported replay version {version}.")
+        _, _, fps, start_level, start_x, start_y, frames = header.unpack_from(data, 0)
+        offset = header.size
+        end_level, end_x, end_y = end_state.unpack_from(data, offset)
+        offset += end_state.size
+        length, = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        username = bytes(data[offset:offset + length]).decode("utf-8")
+        offset += length
+        count, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        inputs = []
+        for _ in range(count):
+            frame, length = INPUT.unpack_from(data, offset)
+            offset += INPUT.size
+            if offset + length > len(data):
+                raise ValueError("Replay is truncated.")
+            inputs.append((frame, bytes(data[offset:offset + length]).decode("utf-8")))
+            offset += length
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Replay is corrupt: {e}")
+    return Replay(username, fps, start_level, (start_x, start_y), frames, end_level, (end_x, end_y), tuple(inputs))
+
+
+class ReplayRecorder:
+    """
+    Collects a replay while run_game plays: the start, then every function the
+    player submits with the frame it was entered on.
+    """
+    def __init__(self, username, fps, start_level, start):
+        self.username = username
+        self.fps = fps
+        self.start_level = start_level
+        self.start = tuple(start)
+        self.inputs = []
+
+    def add_input(self, frame, text):
+        self.inputs.append((frame, text))
+
+    def finish(self, frames, end_level, end):
+        """
+        The Replay of a session that ran `frames` frames and ended on `end_level` at `end`.
+        """
+        return Replay(self.username, self.fps, self.start_level, self.start, frames,
+                      end_level, tuple(end), tuple(self.inputs))
+
+
+# -----------------------------
+# Local Replay Files
+# -----------------------------
+def save_replay_file(data, directory=REPLAY_DIR):
+    """
+    Write replay bytes to a new file in `directory`. Returns its path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}{REPLAY_SUFFIX}")
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return path
+
+
+def pending_replay_files(directory=REPLAY_DIR):
+    """
+    Replay files not uploaded yet, oldest first.
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names) if name.endswith(REPLAY_SUFFIX)]
+
+
+def read_replay_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# -----------------------------
+# Playback Engine
+# -----------------------------
+# What happened on a frame: "input" (a function was entered), "hit_wall", "collision"
+# (pushed out of a wall or back on screen), "error" (the function did not compile
+# or failed), "level_complete"; `detail` is the function text, the wall, ...
+ReplayEvent = namedtuple("ReplayEvent", ["frame", "kind", "level", "position", "detail"])
+
+ReplayResult = namedtuple("ReplayResult", ["frames", "level", "position", "matches", "events"])
+
+
+class ReplayEngine:
+    """
+    Plays a Replay one frame at a time through the rules of logic/rules.py, in
+    the same order as run_game's loop. Needs no display; step() as fast as
+    wanted (fast-forward) or once per tick of a clock (real time).
+    """
+    def __init__(self, replay, levels):
+        self.replay = replay
+        self.levels = levels
+        self.level = replay.start_level
+        self.player = PlayerBox(replay.start, (PLAYER_SIZE, PLAYER_SIZE))
+        self.frame = 0
+        self.user_function = None
+        self.events = []
+        self._inputs = dict(replay.inputs)
+        self._collided = True
+        self._input_active = True
+        self._input_open = False  # run_game's text box
+        self._geometry = None
+        self._loaded_level = None
+
+    @property
+    def done(self):
+        return self.frame >= self.replay.frames or self.level > self.levels.last_number()
+
+    def _event(self, kind, detail=None):
+        self.events.append(ReplayEvent(self.frame, kind, self.level, self.player.topleft, detail))
+
+    def step(self):
+        """
+        Play one frame. Returns the events of that frame.
+        """
+        first_event = len(self.events)
+        player = self.player
+
+        # The text box hands over a function on the frame it was entered
+        if self._input_open and self.frame in self._inputs:
+            self.user_function = self._inputs[self.frame]
+            self._input_open = False
+            self._input_active = False
+            self._event("input", self.user_function)
+
+        old_x, old_y = player.x, player.y
+        if self._loaded_level != self.level:
+            self._geometry = LevelGeometry(self.levels.get(self.level))
+            self._loaded_level = self.level
+        geometry = self._geometry
+
+        pushed = False
+        if hits_wall(player, geometry):
+            player.x, player.y = old_x, old_y
+            pushed = True
+        if clamp_to_screen(player):
+            pushed = True
+        if pushed:
+            self._event("collision")
+        if self._collided or pushed:
+            self.user_function = None
+            push_out(player, geometry)
+            self._input_active = True
+            self._collided = False
+
+        if self._input_active and not self._input_open:
+            self._input_open = True
+
+        if self.user_function:
+            try:
+                if self.user_function.strip() == "":
+                    self.user_function = None
+                    self._input_active = True
+                    raise ValueError("User function cannot be blank.")
+                seq_type, _, math_function = compile_user_function(self.user_function)
+                step_x, step_y = function_step(seq_type, math_function)
+                impact = apply_step(player, step_x, step_y, geometry)
+                if impact is not None:
+                    self._collided = True
+                    self._event("hit_wall", f"wall {impact.wall_index} at t={impact.time:.2f}")
+            except Exception as e:
+                self._event("error", str(e))
+                self.user_function = None
+                self._input_active = True
+
+        if reached_exit(player, geometry.exit):
+            self._event("level_complete")
+            self.user_function = None
+            self.level = self.levels.next_number(self.level)
+            if self.level in self.levels:
+                player.topleft = self.levels.get(self.level).spawn
+            self._collided = True
+            self._input_active = True
+
+        self.frame += 1
+        return self.events[first_event:]
+
+    def result(self):
+        """
+        Where the playback ended, and whether that is where the recorded game ended.
+        """
+        matches = (self.frame, self.level, self.player.topleft) == \
+                  (self.replay.frames, self.replay.end_level, self.replay.end)
+        return ReplayResult(self.frame, self.level, self.player.topleft, matches, self.events)
+
+
+def play_replay(replay, levels):
+    """
+    Fast-forward: play the whole replay without a display or frame cap. Returns a ReplayResult.
+    """
+    engine = ReplayEngine(replay, levels)
+    while not engine.done:
+        engine.step()
+    return engine.result()
+
+
+class _ReplayCaption:
+    """
+    LevelRenderer overlay showing the frame and the function being played.
+    """
+    def __init__(self, engine, text_renderer, rect):
+        self.engine = engine
+        self.text_renderer = text_renderer
+        self.rect = rect
+        self.active = True
+        self._drawn_text = None
+
+    def _text(self):
+        function = self.engine.user_function or "..."
+        return f"Replay {self.engine.replay.username}  frame {self.engine.frame}  f: {function}"
+
+    def needs_redraw(self):
+        return self._text() != self._drawn_text
+
+    def draw(self, surface):
+        import pygame
+
+        text = self._text()
+        pygame.draw.rect(surface, (0, 0, 0), self.rect)
+        surface.blit(self.text_renderer.render(text, 24), (self.rect.x + 6, self.rect.y + 6))
+        self._drawn_text = text
+        return self.rect
+
+
+def watch_replay(replay, levels, speed=1.0):
+    """
+    Real time: play the replay in a window at the recorded FPS (times `speed`).
+    Closing the window or pressing Escape stops it early. Returns a ReplayResult.
+    """
+    import pygame
+    from logic.assetpack import get_assets
+    from logic.render import TextureCache, TextRenderer, LevelRenderer, LevelTextures
+    from logic.rules import SCREEN_WIDTH, SCREEN_HEIGHT
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption(f"Replay: {replay.username}")
+    assets = get_assets()
+    text_renderer = TextRenderer()
+    renderer = LevelRenderer(screen, TextureCache(), LevelTextures(
+        assets.surface("background"), assets.surface("wall"), assets.surface("exit"), assets.surface("player")))
+    geometry = None
+    engine = ReplayEngine(replay, levels)
+    caption = _ReplayCaption(engine, text_renderer, pygame.Rect(0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40))
+    clock = pygame.time.Clock()
+
+    stopped = False
+    while not engine.done and not stopped:
+        clock.tick(replay.fps * speed)
+        for event in pygame.event.get():
+            if event.type in (pygame.QUIT, pygame.WINDOWCLOSE) or \
+                    (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                stopped = True
+        for event in engine.step():
+            print(format_event(event))
+        if engine.level in levels and (geometry is None or geometry.level.number != engine.level):
+            geometry = LevelGeometry(levels.get(engine.level), pygame.Rect)
+        if geometry is not None:
+            renderer.redraw(geometry, text_renderer.render(f"Level: {geometry.level.number}", 36),
+                            pygame.Rect(engine.player.topleft, (PLAYER_SIZE, PLAYER_SIZE)), (caption,))
+    pygame.quit()
+    assets.release_surfaces()
+    return engine.result()
+
+
+def format_event(event):
+    line = f"frame {event.frame:6}  level {event.level:2}  at {event.position}  {event.kind}"
+    return f"{line}: {event.detail}" if event.detail else line
+
+
+# -----------------------------
+# Command Line
+# -----------------------------
+def load_replay(args):
+    """
+    Replay bytes from a file, or from the database for --id / --user.
+    """
+    if args.path:
+        return read_replay_file(args.path)
+    from logic.db import Database
+    from logic.utils import get_replay, get_user_replays
+
+    db = Database(maxconn=1)
+    try:
+        if args.user:
+            rows = get_user_replays(db, args.user, limit=1)
+            if not rows:
+                raise ValueError(f"No replays for {args.user}.")
+            args.id = rows[0][0]
+        data = get_replay(db, args.id)
+        if data is None:
+            raise ValueError(f"No replay with id {args.id}.")
+        return data
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    from logic.levelpack import open_level_registry
+
+    parser = argparse.ArgumentParser(prog="python -m logic.replay",
+                                     description="Play back a recorded game to see what happened.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("path", nargs="?", help="replay file")
+    source.add_argument("--id", type=int, help="replay id in the database")
+    source.add_argument("--user", help="the user's latest replay in the database")
+    parser.add_argument("--fast", action="store_true", help="fast-forward without a window and print every event")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed in real time (default 1.0)")
+    args = parser.parse_args(argv)
+
+    replay = decode_replay(load_replay(args))
+    print(f"Replay of {replay.username}: level {replay.start_level} from {replay.start}, "
+          f"{len(replay.inputs)} inputs over {replay.frames} frames at {replay.fps} FPS")
+    levels = open_level_registry()
+    if args.fast:
+        result = play_replay(replay, levels)
+        for event in result.events:
+            print(format_event(event))
+    else:
+        result = watch_replay(replay, levels, args.speed)
+    print(f"Stopped at frame {result.frames} on level {result.level} at {result.position}")
+    if result.frames == replay.frames and not result.matches:
+        print(f"Warning: the recorded game ended on level {replay.end_level} at {replay.end}; "
+              f"the levels or rules have changed since it was recorded.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+from logic.collision import SpatialGrid, wall_bounds, sweep_rect
+
+# -----------------------------
+# Game Rules
+# -----------------------------
+# Movement, collision and level-complete rules shared by run_game (pygame)
+# and the headless engine in logic/simulation.py. The player can be a
+# pygame.Rect or a PlayerBox; walls and the exit are (x, y, w, h) rect-likes.
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+PLAYER_SIZE = 30
+BUFFER_DISTANCE = 2  # Distance to keep from a wall or the screen edge after a collision
+FUNCTION_STEP = 10   # x distance a submitted function moves the player each frame
+RECT_MIN, RECT_MAX = -2147483648, 2147483647  # pygame.Rect stores C ints
+
+
+def round_coordinate(value):
+    """
+    Round to a whole pixel the way pygame.Rect does: halves go away from zero.
+    Like pygame.Rect, refuses values outside the C int range (and NaN) with TypeError.
+    """
+    if not RECT_MIN <= value <= RECT_MAX:
+        raise TypeError(f"invalid rect assignment, expected value between {RECT_MIN} < x < {RECT_MAX}")
+    if value >= 0:
+        return int(value + 0.5)
+    return -int(-value + 0.5)
+
+
+class PlayerBox:
+    """
+    Minimal stand-in for pygame.Rect used by headless code: integer position
+    with the same rounding on assignment and the edge attributes the rules use.
+    """
+    __slots__ = ("_x", "_y", "width", "height")
+
+    def __init__(self, position, size=(PLAYER_SIZE, PLAYER_SIZE)):
+        self._x = round_coordinate(position[0])
+        self._y = round_coordinate(position[1])
+        self.width, self.height = size
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = round_coordinate(value)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = round_coordinate(value)
+
+    left = x
+
+    @property
+    def top(self):
+        return self._y
+
+    @top.setter
+    def top(self, value):
+        self._y = round_coordinate(value)
+
+    @property
+    def right(self):
+        return self._x + self.width
+
+    @right.setter
+    def right(self, value):
+        self._x = round_coordinate(value) - self.width
+
+    @property
+    def bottom(self):
+        return self._y + self.height
+
+    @bottom.setter
+    def bottom(self, value):
+        self._y = round_coordinate(value) - self.height
+
+    @property
+    def topleft(self):
+        return (self._x, self._y)
+
+    @topleft.setter
+    def topleft(self, position):
+        self.x, self.y = position
+
+    def colliderect(self, other):
+        return self._x < other[0] + other[2] and self._x + self.width > other[0] and \
+               self._y < other[1] + other[3] and self._y + self.height > other[1]
+
+    def __getitem__(self, index):
+        return (self._x, self._y, self.width, self.height)[index]
+
+    def __len__(self):
+        return 4
+
+    def __repr__(self):
+        return f"PlayerBox({self._x}, {self._y}, {self.width}, {self.height})"
+
+
+class LevelGeometry:
+    """
+    Everything the rules need about one level, precomputed when it is entered:
+    wall rects, their spatial index, their bounds array for swept checks and the exit.
+    `make_rect` builds the wall/exit objects (pygame.Rect in the game, tuple headless).
+    """
+    def __init__(self, level, make_rect=tuple):
+        self.level = level
+        self.walls = [make_rect(wall) for wall in level.walls]
+        self.exit = make_rect(level.exit)
+        self.grid = SpatialGrid(self.walls)
+        self.bounds = wall_bounds(self.walls)
+
+
+def hits_wall(player, geometry):
+    """
+    True if the player overlaps any wall of the level.
+    """
+    return bool(geometry.grid.query_rect(player))
+
+
+def is_off_screen(player):
+    return player.x < 0 or player.y < 0 or \
+           player.x + PLAYER_SIZE > SCREEN_WIDTH or player.y + PLAYER_SIZE > SCREEN_HEIGHT
+
+
+def clamp_to_screen(player):
+    """
+    Pull the player back inside the screen. Returns True if it was outside (a collision).
+    """
+    if not is_off_screen(player):
+        return False
+    player.x = max(1, min(player.x, SCREEN_WIDTH - PLAYER_SIZE))
+    player.y = max(1, min(player.y, SCREEN_HEIGHT - PLAYER_SIZE))
+    return True
+
+
+def push_out(player, geometry):
+    """
+    After a collision, push the player out of every wall it still overlaps
+    and keep it BUFFER_DISTANCE away from the screen edges.
+    """
+    for wall in geometry.grid.query_rect(player):
+        if not player.colliderect(wall):
+            continue  # Already pushed clear by an earlier wall
+        wall_left, wall_top = wall[0], wall[1]
+        wall_right, wall_bottom = wall[0] + wall[2], wall[1] + wall[3]
+        if player.right >= wall_left and player.left <= wall_left:
+            player.right = wall_left - BUFFER_DISTANCE  # Move player to the left of the wall
+        elif player.left <= wall_right and player.right >= wall_right:
+            player.left = wall_right + BUFFER_DISTANCE  # Move player to the right of the wall
+        if player.bottom >= wall_top and player.top <= wall_top:
+            player.bottom = wall_top - BUFFER_DISTANCE  # Move player above the wall
+        elif player.top <= wall_bottom and player.bottom >= wall_bottom:
+            player.top = wall_bottom + BUFFER_DISTANCE  # Move player below the wall
+    if player.x < 0:
+        player.x = 0 + BUFFER_DISTANCE
+    if player.y < 0:
+        player.y = 0 + BUFFER_DISTANCE
+    if player.x + PLAYER_SIZE > SCREEN_WIDTH:
+        player.x = SCREEN_WIDTH - PLAYER_SIZE - BUFFER_DISTANCE
+    if player.y + PLAYER_SIZE > SCREEN_HEIGHT:
+        player.y = SCREEN_HEIGHT - PLAYER_SIZE - BUFFER_DISTANCE
+
+
+def function_step(seq_type, math_function):
+    """
+    Per-frame (dx, dy) of a submitted function: FUNCTION_STEP to the right ("asc")
+    or left ("desc"), and f(FUNCTION_STEP) upwards.
+    """
+    step_x = FUNCTION_STEP if seq_type == "asc" else -FUNCTION_STEP
+    return step_x, -math_function(FUNCTION_STEP)
+
+
+def apply_step(player, step_x, step_y, geometry):
+    """
+    Move the player by one function step, swept against the walls so steep
+    functions cannot tunnel through them. On a hit the player stops at the point
+    of first contact and the Impact is returned; otherwise returns None.
+    """
+    # Broad phase: only walls near the move are swept, and most moves have none
+    positions = geometry.grid.query_swept_positions(player, step_x, step_y)
+    impact = None
+    if positions:
+        impact = sweep_rect(player, step_x, step_y, geometry.bounds[positions])
+        if impact is not None:
+            impact = impact._replace(wall_index=positions[impact.wall_index])
+    if impact is None:
+        player.x += step_x
+        player.y += step_y
+    else:
+        # Stop at the point of first contact, rounded back towards the start
+        player.x += int(step_x * impact.time)
+        player.y += int(step_y * impact.time)
+    return impact
+
+
+def reached_exit(player, exit_rect):
+    """
+    The level is complete once x is past the exit's left edge and y above its bottom edge.
+    """
+    return player.x > exit_rect[0] and player.y < exit_rect[1] + exit_rect[3]
@@ -0,0 +1,82 @@
+import os
+import threading
+
+from logic.utils import update_high_scores
+
+# Local folder for data the game keeps between runs
+LOCAL_DATA_DIR = os.path.join(os.path.expanduser("~"), ".function_game")
+
+FLUSH_INTERVAL = 1.0   # Seconds between flushes while scores are pending
+RETRY_INTERVAL = 10.0  # Seconds to wait after a failed flush before trying the database again
+BATCH_SIZE = 100       # Users written per statement
+
+
+def sync_scores(db, store):
+    """
+    Push the scores the OfflineStore `store` has marked dirty to the database, in
+    batches, and clear their dirty flags. The store is the only record of scores
+    not yet written, so this is the one way they reach the server.
+    Returns the number of users written; raises if the database fails.
+    """
+    dirty = store.dirty_scores()
+    for start in range(0, len(dirty), BATCH_SIZE):
+        batch = dirty[start:start + BATCH_SIZE]
+        update_high_scores(db, batch)
+        store.mark_synced(batch)
+    return len(dirty)
+
+
+# -----------------------------
+# Write-Behind Score Queue
+# -----------------------------
+class ScoreWriter(threading.Thread):
+    """
+    Background thread that writes high scores to the database so the game loop
+    never waits on the network. Scores are recorded in the local OfflineStore
+    first (marked dirty, one row per user, so repeated updates coalesce) and this
+    thread pushes them with sync_scores. While the database is unreachable they
+    simply stay dirty, also across restarts, and are retried later.
+    """
+    def __init__(self, db, store, flush_interval=FLUSH_INTERVAL, retry_interval=RETRY_INTERVAL):
+        super().__init__(name="ScoreWriter", daemon=True)
+        self.db = db
+        self.store = store
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        """
+        Flush soon: a score was just recorded in the store. Never blocks on the database.
+        """
+        self._wakeup.set()
+
+    def run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self.flush():
+                # Database unreachable: back off, but wake up at once when asked to stop
+                self._stopping.wait(self.retry_interval)
+
+    def flush(self):
+        """
+        Write every dirty score now. Returns False if the database failed; the scores stay dirty.
+        """
+        try:
+            sync_scores(self.db, self.store)
+        except Exception as e:
+            print("Failed to save scores, keeping them for later:", e)
+            return False
+        return True
+
+    def stop(self, timeout=5):
+        """
+        Stop the thread after a last flush. Scores that still cannot be written stay dirty in the store.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.flush()
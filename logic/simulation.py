@@ -0,0 +1,159 @@
+import json
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+from logic.collision import sweep_segments
+from logic.expressions import compile_user_function
+from logic.rules import (
+    PLAYER_SIZE, LevelGeometry, PlayerBox, round_coordinate, hits_wall, is_off_screen,
+    clamp_to_screen, push_out, function_step, apply_step, reached_exit,
+)
+
+# -----------------------------
+# Headless Game Engine
+# -----------------------------
+# Plays one level with a list of function inputs, using the same rules as
+# run_game but without a display, Tk windows or a frame-rate cap. Each input
+# is handed out whenever run_game would open its input window.
+
+COMPLETED = "completed"          # The player reached the exit
+OUT_OF_INPUTS = "out_of_inputs"  # The game asked for another function but none were left
+FRAME_LIMIT = "frame_limit"      # Still playing after max_frames frames
+
+DEFAULT_MAX_FRAMES = 10000
+
+# A player position; the rules only read .x and .y, so this is enough for exit/screen checks
+Position = namedtuple("Position", ["x", "y"])
+
+# `path` holds the player's (x, y) at the end of every frame
+SimulationResult = namedtuple("SimulationResult", ["outcome", "level", "frames", "inputs_used", "path"])
+
+
+def _fly(player, step_x, step_y, geometry, frame_budget, path):
+    """
+    Advance the player under one function until it hits a wall, reaches the exit,
+    leaves the screen or runs out of frames. Frame by frame this matches run_game:
+    move (swept against the walls), then check the exit; a position off screen is
+    clamped at the start of the next frame. Returns (frames_used, hit_wall).
+    """
+    # The first frame goes through the exact run_game rule, errors included
+    impact = apply_step(player, step_x, step_y, geometry)
+    path.append(player.topleft)
+    if impact is not None:
+        return 1, True
+    if frame_budget == 1 or reached_exit(player, geometry.exit) or is_off_screen(player):
+        return 1, False
+
+    # Later frames: walk the positions (rounded like pygame.Rect), then sweep all moves in one batch
+    starts_x, starts_y = [player.x], [player.y]
+    ends = []
+    position = Position(player.x, player.y)
+    while len(ends) < frame_budget - 1:
+        position = Position(round_coordinate(position.x + step_x), round_coordinate(position.y + step_y))
+        ends.append(position)
+        if reached_exit(position, geometry.exit) or is_off_screen(position):
+            break
+        starts_x.append(position.x)
+        starts_y.append(position.y)
+    moves = len(ends)
+    del starts_x[moves:], starts_y[moves:]
+
+    impact = sweep_segments((player.width, player.height), starts_x, starts_y,
+                            [step_x] * moves, [step_y] * moves, geometry.bounds)
+    if impact is None:
+        path.extend(ends)
+        player.topleft = ends[-1]
+        return 1 + moves, False
+
+    # Stop at the point of first contact, rounded back towards the start
+    segment = impact.segment
+    path.extend(ends[:segment])
+    player.topleft = (starts_x[segment], starts_y[segment])
+    player.x += int(step_x * impact.time)
+    player.y += int(step_y * impact.time)
+    path.append(player.topleft)
+    return 2 + segment, True
+
+
+@lru_cache(maxsize=64)
+def level_geometry(level):
+    """
+    LevelGeometry for a Level, built once and reused across simulations.
+    """
+    return LevelGeometry(level)
+
+
+def simulate(level, inputs, max_frames=DEFAULT_MAX_FRAMES):
+    """
+    Play `level` (a logic.levels.Level) feeding it the function strings in `inputs`
+    (e.g. ["asc!y=x", "desc!y=-x//3"]) in order. Returns a SimulationResult.
+    """
+    geometry = level_geometry(level)
+    player = PlayerBox(level.spawn, (PLAYER_SIZE, PLAYER_SIZE))
+    inputs = iter(inputs)
+    inputs_used = 0
+    path = []
+
+    user_function = None
+    collided = True
+    input_active = True
+    frames = 0
+    while frames < max_frames:
+        old_x, old_y = player.x, player.y
+
+        if hits_wall(player, geometry):
+            player.x, player.y = old_x, old_y
+            collided = True
+        if clamp_to_screen(player):
+            collided = True
+        if collided:
+            user_function = None
+            push_out(player, geometry)
+            input_active = True
+
+        if input_active:
+            user_function = next(inputs, None)
+            if user_function is None:
+                return SimulationResult(OUT_OF_INPUTS, level.number, frames, inputs_used, path)
+            inputs_used += 1
+            input_active = False
+            collided = False
+
+        if user_function is not None:
+            try:
+                if user_function.strip() == "":
+                    raise ValueError("User function cannot be blank.")
+                seq_type, _, math_function = compile_user_function(user_function)
+                step_x, step_y = function_step(seq_type, math_function)
+                used, collided = _fly(player, step_x, step_y, geometry, max_frames - frames, path)
+                frames += used
+            except Exception:
+                # Same as run_game: a bad function costs a frame and asks for the next input
+                input_active = True
+                frames += 1
+                path.append(player.topleft)
+                continue
+        else:
+            frames += 1
+            path.append(player.topleft)
+
+        if reached_exit(player, geometry.exit):
+            return SimulationResult(COMPLETED, level.number, frames, inputs_used, path)
+
+    return SimulationResult(FRAME_LIMIT, level.number, frames, inputs_used, path)
+
+
+if __name__ == '__main__':
+    # python -m logic.simulation <level> "<function>" ["<function>" ...]
+    from logic.levelpack import open_level_registry
+
+    if len(sys.argv) < 2:
+        print('Usage: python -m logic.simulation <level> "asc!y=x" ["desc!y=-x" ...]')
+        sys.exit(1)
+    level = open_level_registry().get(int(sys.argv[1]))
+    if level is None:
+        print(f"Unknown level: {sys.argv[1]}")
+        sys.exit(1)
+    result = simulate(level, sys.argv[2:])
+    print(json.dumps(result._asdict()))
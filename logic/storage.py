@@ -0,0 +1,276 @@
+import os
+import threading
+
+from logic.offline import OfflineStore
+from logic.leaderboard_cache import LeaderboardCache, AROUND_RADIUS
+from logic.score_queue import ScoreWriter, sync_scores
+from logic.utils import (
+    LEADERBOARD_PAGE_SIZE, create_tables, register_user, authenticate_user,
+    get_user_high_score, get_high_scores, rank_rows, save_replay,
+)
+
+RECONNECT_INTERVAL = 30  # Seconds between attempts to reach the database while offline
+CONNECTION_WAIT = 6      # Seconds a login waits for the first connection attempt (logic.db.CONNECT_TIMEOUT + 1)
+
+
+# -----------------------------
+# Online/Offline Storage
+# -----------------------------
+class Storage:
+    """
+    Front for everything the game stores. Talks to Postgres when it is reachable
+    and to the local OfflineStore mirror otherwise, so the game can start and be
+    played without a connection. The database is connected in the background
+    (and retried while offline); once it is up, scores earned offline are synced.
+    """
+    def __init__(self, store=None, replay_dir=None):
+        if store is None:
+            store = OfflineStore()
+            store.import_journal()  # Scores left queued by older versions
+        self.store = store
+        self.replay_dir = replay_dir  # None: logic.replay.REPLAY_DIR
+        self.db = None
+        self.score_writer = None
+        self.leaderboard = None  # LeaderboardCache while online
+        self._lock = threading.Lock()
+        self._connect_attempted = threading.Event()
+        self._stopping = threading.Event()
+        self._connector = None
+
+    @property
+    def online(self):
+        return self.db is not None
+
+    # -----------------------------
+    # Connection
+    # -----------------------------
+    def connect_in_background(self):
+        """
+        Start connecting to the database without blocking the caller.
+        """
+        self._connector = threading.Thread(target=self._connect_loop, name="StorageConnect", daemon=True)
+        self._connector.start()
+
+    def _connect_loop(self):
+        # psycopg2 and dotenv are imported here, off the UI thread, while the login screen is shown
+        from logic.db import create_database, missing_settings
+
+        missing = missing_settings()
+        if missing:
+            print(f"No database configured ({', '.join(missing)} not set), playing offline.")
+            self._connect_attempted.set()
+            return
+        while not self._stopping.is_set():
+            db = create_database()
+            if db is not None:
+                try:
+                    create_tables(db)
+                except Exception as e:
+                    print("Failed to prepare database, staying offline:", e)
+                    db.close()
+                    db = None
+            if db is not None and self._stopping.is_set():
+                db.close()  # Closed while we were connecting
+                return
+            if db is not None:
+                with self._lock:
+                    self.db = db
+                    self.leaderboard = LeaderboardCache(db)
+                    self.score_writer = ScoreWriter(db, self.store)
+                    self.score_writer.start()
+                print("Database connected.")
+                self._connect_attempted.set()
+                self.sync()
+                return
+            print("Database unreachable, playing offline.")
+            self._connect_attempted.set()
+            self._stopping.wait(RECONNECT_INTERVAL)
+
+    def wait_for_connection(self, timeout=CONNECTION_WAIT):
+        """
+        Wait until the first connection attempt has finished. Returns True if online.
+        """
+        self._connect_attempted.wait(timeout)
+        return self.online
+
+    def sync(self):
+        """
+        Reconcile with the database: push scores earned offline, then refresh the
+        locally cached users' scores from the server.
+        Returns False if the database is not reachable.
+        """
+        if not self.online:
+            return False
+        try:
+            synced = sync_scores(self.db, self.store)
+            self.store.mirror_scores(get_high_scores(self.db, self.store.all_scores()))
+        except Exception as e:
+            print("Failed to sync offline scores:", e)
+            return False
+        if synced:
+            print(f"Synced {synced} offline score(s).")
+        return self._upload_replays()
+
+    def _upload_replays(self):
+        """
+        Upload the replay files saved by save_replay and delete them once stored.
+        """
+        from logic.replay import REPLAY_DIR, pending_replay_files, read_replay_file, decode_replay  # Deferred: loads the rules
+
+        uploaded = 0
+        for path in pending_replay_files(self.replay_dir or REPLAY_DIR):
+            try:
+                data = read_replay_file(path)
+                replay = decode_replay(data)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable replay {path}: {e}")
+                continue
+            try:
+                save_replay(self.db, replay.username, replay.start_level, replay.end_level, replay.frames, data)
+            except Exception as e:
+                print("Failed to upload replays, keeping them for later:", e)
+                return False
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Failed to remove uploaded replay {path}: {e}")
+            uploaded += 1
+        if uploaded:
+            print(f"Uploaded {uploaded} replay(s).")
+        return True
+
+    # -----------------------------
+    # Accounts
+    # -----------------------------
+    def authenticate(self, username, password):
+        """
+        Check credentials against the database, or against the local cache when offline.
+        Returns the username on success or None.
+        """
+        if self.wait_for_connection():
+            try:
+                result = authenticate_user(self.db, username, password)
+            except Exception as e:
+                print("Database login failed, trying offline:", e)
+            else:
+                if result is not None:
+                    self.store.remember_login(username, password)
+                return result
+        return self.store.authenticate(username, password)
+
+    def register(self, username, password):
+        """
+        Register a new user. Needs the database, since only it can tell whether the name is taken.
+        Returns the username on success or None.
+        """
+        if not self.wait_for_connection():
+            print("Registration needs a connection to the database.")
+            return None
+        try:
+            result = register_user(self.db, username, password)
+        except Exception as e:
+            print("Error registering user:", e)
+            return None
+        if result is not None:
+            self.store.remember_login(username, password)
+        return result
+
+    # -----------------------------
+    # Scores
+    # -----------------------------
+    def get_high_score(self, username):
+        """
+        The user's high score: the better of the server's and the local one.
+        """
+        if self.online:
+            try:
+                server_score = get_user_high_score(self.db, username) or 0
+                self.store.mirror_scores({username: server_score})
+            except Exception as e:
+                print("Failed to read high score, using the local one:", e)
+        return self.store.get_high_score(username)
+
+    def record_high_score(self, username, score):
+        """
+        Save a new high score locally at once; the score writer sends it to the database.
+        """
+        self.store.record_high_score(username, score)
+        with self._lock:
+            if self.score_writer is not None:
+                self.score_writer.wake()
+            if self.leaderboard is not None:
+                self.leaderboard.apply_score(username, score)  # The leaderboard shows it without a refresh
+
+    def save_replay(self, data):
+        """
+        Keep a recorded game (replay bytes) locally; the next sync uploads it.
+        Returns the file's path, or None if it could not be written.
+        """
+        from logic.replay import REPLAY_DIR, save_replay_file
+
+        try:
+            path = save_replay_file(data, self.replay_dir or REPLAY_DIR)
+        except OSError as e:
+            print("Failed to save replay:", e)
+            return None
+        print(f"Saved replay to {path} ({len(data)} bytes)")
+        return path
+
+    def get_leaderboard_page(self, after=None, limit=LEADERBOARD_PAGE_SIZE):
+        """
+        One leaderboard page [(rank, username, high_score)], see logic.utils.get_leaderboard_page.
+        Online it is served from the cached snapshot; offline it is built from the users known locally.
+        """
+        if self.online:
+            return self.leaderboard.page(after, limit)
+        rows = self._offline_leaderboard()
+        start = 0
+        if after is not None:
+            while start < len(rows) and (-rows[start][1], rows[start][0]) <= (-after[0], after[1]):
+                start += 1
+        return rank_rows(rows, 0, 1)[start:start + limit]
+
+    def get_user_rank(self, username):
+        """
+        The user's (rank, high_score), or None if unknown.
+        """
+        if self.online:
+            return self.leaderboard.rank(username)
+        for rank, name, score in rank_rows(self._offline_leaderboard(), 0, 1):
+            if name == username:
+                return rank, score
+        return None
+
+    def get_leaderboard_around(self, username, radius=AROUND_RADIUS):
+        """
+        The user's leaderboard row with up to `radius` rows on each side.
+        """
+        if self.online:
+            return self.leaderboard.around(username, radius)
+        rows = rank_rows(self._offline_leaderboard(), 0, 1)
+        for position, row in enumerate(rows):
+            if row[1] == username:
+                return rows[max(position - radius, 0):position + radius + 1]
+        return []
+
+    def _offline_leaderboard(self):
+        return sorted(self.store.all_scores().items(), key=lambda row: (-row[1], row[0]))
+
+    def flush(self):
+        """
+        Write recorded scores now instead of waiting for the score writer,
+        e.g. before the leaderboard reads them.
+        """
+        self.sync()
+
+    def close(self):
+        self._stopping.set()
+        with self._lock:
+            writer, self.score_writer = self.score_writer, None
+        if writer is not None:
+            writer.stop()
+        self.sync()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        self.store.close()
@@ -0,0 +1,155 @@
+import pygame
+
+FONT_SIZE = 28
+TEXT_COLOR = (255, 255, 255)
+BOX_COLOR = (30, 30, 30)
+BORDER_COLOR = (255, 215, 0)
+PADDING = 8
+CURSOR_BLINK_MS = 500
+KEY_REPEAT = (400, 35)  # Delay and interval (ms) for held keys such as Backspace
+
+
+# -----------------------------
+# Glyph Cache
+# -----------------------------
+class GlyphCache:
+    """
+    Renders each character once and keeps the surface, so drawing a line of
+    text is a few blits instead of a font render per keystroke.
+    """
+    def __init__(self, font, color=TEXT_COLOR):
+        self.font = font
+        self.color = color
+        self.height = font.get_linesize()
+        self._glyphs = {}  # char -> Surface
+
+    def glyph(self, char):
+        surface = self._glyphs.get(char)
+        if surface is None:
+            surface = self.font.render(char, True, self.color)
+            self._glyphs[char] = surface
+        return surface
+
+    def width(self, text):
+        return sum(self.glyph(char).get_width() for char in text)
+
+    def draw(self, surface, text, pos):
+        """
+        Blit `text` at `pos`. Returns the x coordinate just after the last glyph.
+        """
+        x, y = pos
+        for char in text:
+            glyph = self.glyph(char)
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return x
+
+
+# -----------------------------
+# In-Game Text Input
+# -----------------------------
+class TextInput:
+    """
+    Single-line text box drawn over the game screen. It is fed the game loop's
+    pygame events and never blocks, so the game keeps running while the player types.
+    """
+    def __init__(self, rect, prompt="", font=None, max_length=64):
+        self.rect = pygame.Rect(rect)
+        self.prompt = prompt
+        self.max_length = max_length
+        self.glyphs = GlyphCache(font or pygame.font.Font(None, FONT_SIZE))
+        self.active = False
+        self.text = ""
+        self.cursor = 0
+        self._drawn_state = None  # (text, cursor, cursor visible) of the last draw
+
+    def open(self):
+        """
+        Show an empty box and start taking keyboard input.
+        """
+        self.active = True
+        self.text = ""
+        self.cursor = 0
+        self._drawn_state = None
+        pygame.key.start_text_input()
+        pygame.key.set_text_input_rect(self.rect)
+        pygame.key.set_repeat(*KEY_REPEAT)
+
+    def close(self):
+        self.active = False
+        pygame.key.stop_text_input()
+        pygame.key.set_repeat()
+
+    def handle_event(self, event):
+        """
+        Apply one pygame event. Returns the entered text when the player presses
+        Enter on a non-blank line, otherwise None.
+        """
+        if not self.active:
+            return None
+        if event.type == pygame.TEXTINPUT:
+            room = self.max_length - len(self.text)
+            typed = event.text[:room]
+            self.text = self.text[:self.cursor] + typed + self.text[self.cursor:]
+            self.cursor += len(typed)
+        elif event.type == pygame.KEYDOWN:
+            if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                if not self.text.strip():
+                    print("Error: User input cannot be blank.")
+                    return None  # Keep the box open; let the user retry
+                return self.text
+            elif event.key == pygame.K_BACKSPACE and self.cursor > 0:
+                self.text = self.text[:self.cursor - 1] + self.text[self.cursor:]
+                self.cursor -= 1
+            elif event.key == pygame.K_DELETE:
+                self.text = self.text[:self.cursor] + self.text[self.cursor + 1:]
+            elif event.key == pygame.K_LEFT:
+                self.cursor = max(self.cursor - 1, 0)
+            elif event.key == pygame.K_RIGHT:
+                self.cursor = min(self.cursor + 1, len(self.text))
+            elif event.key == pygame.K_HOME:
+                self.cursor = 0
+            elif event.key == pygame.K_END:
+                self.cursor = len(self.text)
+            elif event.key == pygame.K_ESCAPE:
+                self.text = ""
+                self.cursor = 0
+        return None
+
+    def _state(self):
+        cursor_visible = (pygame.time.get_ticks() // CURSOR_BLINK_MS) % 2 == 0
+        return self.text, self.cursor, cursor_visible
+
+    def needs_redraw(self):
+        """
+        True if the text, the cursor or its blink changed since the last draw.
+        """
+        return self.active and self._state() != self._drawn_state
+
+    def draw(self, surface):
+        """
+        Draw the box onto `surface` and return the rectangle that changed.
+        """
+        state = self._state()
+        text, cursor, cursor_visible = state
+        pygame.draw.rect(surface, BOX_COLOR, self.rect)
+        pygame.draw.rect(surface, BORDER_COLOR, self.rect, 2)
+
+        y = self.rect.y + (self.rect.height - self.glyphs.height) // 2
+        x = self.glyphs.draw(surface, self.prompt, (self.rect.x + PADDING, y))
+
+        # Scroll long input so the cursor stays inside the box
+        room = self.rect.right - PADDING - x
+        start = 0
+        while start < cursor and self.glyphs.width(text[start:cursor]) > room:
+            start += 1
+        clip = surface.get_clip()
+        surface.set_clip(pygame.Rect(x, self.rect.y, max(room, 0), self.rect.height))
+        cursor_x = x + self.glyphs.width(text[start:cursor])
+        self.glyphs.draw(surface, text[start:], (x, y))
+        surface.set_clip(clip)
+
+        if cursor_visible:
+            pygame.draw.line(surface, TEXT_COLOR, (cursor_x, y), (cursor_x, y + self.glyphs.height - 2), 2)
+        self._drawn_state = state
+        return self.rect
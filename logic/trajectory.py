@@ -0,0 +1,134 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from logic.expressions import CACHE_SIZE, normalize_text, parse_expression, build_function
+
+# -----------------------------
+# NumPy Namespace for User Functions
+# -----------------------------
+# The same whitelisted expressions as logic.expressions, but evaluated over a
+# whole array of x values in one call: sin/cos/abs/pow and math.* map to ufuncs.
+# Results must match the scalar engine: x is a float64 array, powers are taken
+# in floats, and whatever raises there (division by zero, math domain errors,
+# overflow) raises ValueError here instead of turning into inf or nan.
+
+
+def vector_pow(base, exponent):
+    """
+    pow() over arrays. Computed in floats, so `2 ** -1` is 0.5 as in Python;
+    NumPy refuses negative integer powers of integers.
+    """
+    return np.power(np.asarray(base, dtype=np.float64), exponent)
+
+
+MATH_UFUNCS = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan, "atan2": np.arctan2,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "asinh": np.arcsinh, "acosh": np.arccosh, "atanh": np.arctanh,
+    "exp": np.exp, "expm1": np.expm1, "log": np.log, "log2": np.log2, "log10": np.log10,
+    "log1p": np.log1p, "sqrt": np.sqrt, "pow": vector_pow, "hypot": np.hypot,
+    "fabs": np.fabs, "floor": np.floor, "ceil": np.ceil, "trunc": np.trunc,
+    "fmod": np.fmod, "copysign": np.copysign, "degrees": np.degrees, "radians": np.radians,
+}
+
+
+class _VectorMath:
+    """
+    Stand-in for the `math` module: the MATH_UFUNCS ufuncs and plain constants (math.pi, ...).
+    A math function without a ufunc is an error, not a slow per-element fallback:
+    add it to MATH_UFUNCS when it is added to ALLOWED_MATH_ATTRIBUTES.
+    """
+    def __getattr__(self, name):
+        if name in MATH_UFUNCS:
+            return MATH_UFUNCS[name]
+        value = getattr(math, name)
+        if callable(value):
+            raise AttributeError(f"math.{name} has no NumPy version in MATH_UFUNCS.")
+        return value
+
+
+VECTOR_GLOBALS = {
+    "__builtins__": {},
+    "math": _VectorMath(),
+    "cos": np.cos,
+    "sin": np.sin,
+    "abs": np.abs,
+    "pow": vector_pow,  # `a ** b` is compiled into a call to this too
+}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_vectorized(expression):
+    return build_function(parse_expression(expression), VECTOR_GLOBALS)
+
+
+def compile_vectorized(expression):
+    """
+    Validate and compile a math expression of `x` into a function over NumPy arrays.
+    """
+    return _compile_vectorized(normalize_text(expression))
+
+
+# -----------------------------
+# Trajectory Evaluation
+# -----------------------------
+def evaluate_curve(expression, xs):
+    """
+    Evaluate y = f(x) for every x in `xs` in one batched call.
+    Returns a float64 array shaped like `xs`. Raises ValueError on bad input, and
+    where the game's scalar evaluation would fail for one of the x values.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    function = compile_vectorized(expression)
+    try:
+        # Make NumPy raise where Python's float math raises, instead of returning inf/nan
+        with np.errstate(all="raise", under="ignore"):
+            ys = function(xs)
+    except FloatingPointError as e:
+        reason = "division by zero" if "divide by zero" in str(e) else str(e)
+        raise ValueError(f"Cannot evaluate {expression}: {reason}")
+    except Exception as e:
+        raise ValueError(f"Cannot evaluate {expression}: {e}")
+    # Constant expressions ("y=5") give a scalar back
+    ys = np.broadcast_to(np.asarray(ys, dtype=np.float64), xs.shape).copy()
+    finite = np.isfinite(ys)
+    if not finite.all():
+        raise ValueError(f"Cannot evaluate {expression}: no finite value at x={xs[~finite][0]:g}")
+    return ys
+
+
+def direction(seq_type):
+    """
+    +1 for "asc" (move right), -1 for "desc" (move left).
+    """
+    if seq_type == "asc":
+        return 1
+    if seq_type == "desc":
+        return -1
+    raise ValueError(f"Invalid sequence type: {seq_type}. Expected 'asc' or 'desc'.")
+
+
+def curve_path(seq_type, expression, start, xs):
+    """
+    Screen positions of the curve y = f(x) drawn from `start`, sampled at `xs`.
+    x grows to the right for "asc" and to the left for "desc"; y grows upwards
+    (screen y decreases). Returns (path_x, path_y) arrays, used for path previews.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = evaluate_curve(expression, xs)
+    return start[0] + direction(seq_type) * xs, start[1] - ys
+
+
+def player_path(seq_type, expression, start, frames, x_step=10):
+    """
+    Positions of the player after each of `frames` frames of run_game's movement:
+    every frame moves x by +/-x_step and y by -f(x_step).
+    Returns (path_x, path_y) arrays of length `frames`. Positions are not rounded;
+    pygame.Rect rounds them to whole pixels when the game applies them.
+    """
+    dy = evaluate_curve(expression, np.array([x_step]))[0]
+    counts = np.arange(1, frames + 1, dtype=np.float64)
+    return start[0] + direction(seq_type) * x_step * counts, start[1] - dy * counts
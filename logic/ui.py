@@ -7,15 +7,10 @@ from kivy.uix.popup import Popup
 from kivy.graphics import Rectangle
 from kivy.uix.button import Button
 from kivy.core.window import Window
-from logic.utils import create_connection, authenticate_user, register_user
+from logic.storage import Storage
+from logic.assetpack import get_assets
 import sys
 import gc
-import os
-
-def get_bg_image_path():
-    base_dir = os.path.dirname(os.path.abspath(__file__)) 
-    project_root = os.path.dirname(base_dir)  
-    return os.path.join(project_root, "assets", "cobelstone.jpg")
 
 # Screen for Login
 class LoginScreen(Screen):
@@ -24,7 +19,7 @@ class LoginScreen(Screen):
         self.app = app
          # Add a background image using canvas.before
         with self.canvas.before:
-            self.bg_rect = Rectangle(source=get_bg_image_path(), pos=self.pos, size=self.size)
+            self.bg_rect = Rectangle(texture=get_assets().texture("login_background"), pos=self.pos, size=self.size)
         # Bind the screen's position and size to the update_bg method.
         self.bind(pos=self.update_bg, size=self.update_bg)
         
@@ -62,7 +57,7 @@ class LoginScreen(Screen):
     def login(self, instance):
         # Store login data in the app instance
         self.app.user_action = 'login'
-        if (self.username.text != "" and self.password.text != "") and ((res:=authenticate_user(self.app.conn, self.username.text, self.password.text)) != None):
+        if (self.username.text != "" and self.password.text != "") and ((res:=self.app.storage.authenticate(self.username.text, self.password.text)) != None):
             self.app.username = res
             self.app.stop()  
         else:
@@ -78,7 +73,7 @@ class RegisterScreen(Screen):
         self.app = app
         
         with self.canvas.before:
-            self.bg_rect = Rectangle(source=get_bg_image_path(), pos=self.pos, size=self.size)
+            self.bg_rect = Rectangle(texture=get_assets().texture("login_background"), pos=self.pos, size=self.size)
         self.bind(pos=self.update_bg, size=self.update_bg)
         
         layout = BoxLayout(orientation='vertical', padding=20, spacing=10)
@@ -119,7 +114,7 @@ class RegisterScreen(Screen):
     def register(self, instance):
         # Store registration data in the app instance
         self.app.user_action = 'register'
-        if (self.new_username.text != "" and self.new_password.text != "") and ((res:= register_user(self.app.conn, self.new_username.text, self.new_password.text)) != None):
+        if (self.new_username.text != "" and self.new_password.text != "") and ((res:= self.app.storage.register(self.new_username.text, self.new_password.text)) != None):
             self.app.username = res
             self.app.stop()  
         else:
@@ -129,9 +124,9 @@ class RegisterScreen(Screen):
         self.manager.current = 'login'
 
 class LoginApp(App):
-    def __init__(self, conn, **kwargs):
+    def __init__(self, storage, **kwargs):
         super().__init__(**kwargs)
-        self.conn = conn
+        self.storage = storage  # logic.storage.Storage, works online and offline
         self.username = None
         self.user_action = None  # Store whether the user logged in or registered
         self.user_data = None  # Store the user's input data
@@ -153,5 +148,8 @@ class LoginApp(App):
 
 
 if __name__ == '__main__':
-    app = LoginApp(conn=create_connection())
+    storage = Storage()
+    storage.connect_in_background()
+    app = LoginApp(storage=storage)
     app.run()
+    storage.close()
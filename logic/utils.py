@@ -1,16 +1,79 @@
-import os
-from dotenv import load_dotenv
-import psycopg2
+# Every function takes the shared logic.db.Database pool and holds one of its
+# connections only for the duration of the call.
 
-load_dotenv()
+LEADERBOARD_PAGE_SIZE = 50
 
-POSTGRES_HOST = os.getenv('POSTGRES_HOST')        # e.g., "localhost" or "remote.server.com"
-POSTGRES_DB = os.getenv('POSTGRES_DB') 
-POSTGRES_USER = os.getenv('POSTGRES_USER') 
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD') 
-POSTGRES_PORT = os.getenv('POSTGRES_PORT')
+# Leaderboard order is high_score DESC, username, with a missing high_score
+# counting as 0. It is indexed as (-score, username), both ascending, so a page
+# cursor is a single row comparison the index can seek to.
+SCORE = "COALESCE(high_score, 0)"
+RANK_KEY = f"(-{SCORE}, username)"
 
-def register_user(conn, username, password):
+
+def create_tables(db):
+    """
+    Create the tables, columns and indexes the game needs, if they do not exist.
+    The catalog is checked first and only what is missing is created, so a client
+    starting against an up-to-date database takes no locks on its tables.
+    """
+    users_query = """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(255) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        high_score INTEGER DEFAULT 0
+    )
+    """
+    # updated_at is bumped whenever high_score changes, so leaderboard caches can fetch just the changes.
+    # ALTER TABLE takes an ACCESS EXCLUSIVE lock on users, so it only runs while the column is missing.
+    updated_at_query = """
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    """
+    # Recorded games (logic/replay.py), uploaded next to the high scores
+    replays_query = """
+    CREATE TABLE IF NOT EXISTS replays (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(255) NOT NULL,
+        start_level INTEGER NOT NULL,
+        end_level INTEGER NOT NULL,
+        frames INTEGER NOT NULL,
+        data BYTEA NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """
+    index_queries = {
+        "users_leaderboard_idx": f"CREATE INDEX IF NOT EXISTS users_leaderboard_idx ON users ((-{SCORE}), username)",
+        "users_updated_at_idx": "CREATE INDEX IF NOT EXISTS users_updated_at_idx ON users (updated_at)",
+        "replays_username_idx": "CREATE INDEX IF NOT EXISTS replays_username_idx ON replays (username, created_at)",
+    }
+    # What already exists, in the schema the tables are created in
+    catalog_query = """
+    SELECT to_regclass('users') IS NOT NULL,
+           to_regclass('replays') IS NOT NULL,
+           EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = current_schema() AND table_name = 'users' AND column_name = 'updated_at'),
+           ARRAY(SELECT indexname FROM pg_indexes WHERE schemaname = current_schema())
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(catalog_query)
+            has_users, has_replays, has_updated_at, indexes = cur.fetchone()
+            queries = []
+            if not has_users:
+                queries.append(users_query)
+            if not has_updated_at:
+                queries.append(updated_at_query)
+            if not has_replays:
+                queries.append(replays_query)
+            queries += [query for name, query in index_queries.items() if name not in indexes]
+            for query in queries:
+                cur.execute(query)
+        if queries:
+            conn.commit()
+            print(f"Prepared database ({len(queries)} change(s)).")
+
+
+def register_user(db, username, password):
     """
     Simple function to register a new user (username, password).
     Returns the username on success or None on failure.
@@ -19,74 +82,283 @@ def register_user(conn, username, password):
     check_query = "SELECT id FROM users WHERE username = %s"
     insert_query = "INSERT INTO users (username, password, high_score) VALUES (%s, %s, 0) RETURNING id"
 
-    with conn.cursor() as cur:
-        cur.execute(check_query, (username,))
-        if cur.fetchone():
-            print("Username already exists!")
-            return None
-        
-        try:
-            cur.execute(insert_query, (username, password))
-            new_id = cur.fetchone()[0]
-            conn.commit()
-            print(f"User registered successfully with id={new_id}")
-            return username
-        except Exception as e:
-            conn.rollback()
-            print("Error registering user:", e)
-            return None
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(check_query, (username,))
+            if cur.fetchone():
+                print("Username already exists!")
+                return None
+
+            try:
+                cur.execute(insert_query, (username, password))
+                new_id = cur.fetchone()[0]
+                conn.commit()
+                print(f"User registered successfully with id={new_id}")
+                return username
+            except Exception as e:
+                conn.rollback()
+                print("Error registering user:", e)
+                return None
 
-def authenticate_user(conn, username, password):
+def authenticate_user(db, username, password):
     """
     Simple function to authenticate an existing user (username, password).
     Returns the username if authentication is successful, or None otherwise.
     """
     query = "SELECT id FROM users WHERE username = %s AND password = %s"
-    with conn.cursor() as cur:
-        cur.execute(query, (username, password))
-        row = cur.fetchone()
-        if row:
-            print("Login successful!")
-            return username
-        else:
-            print("Invalid username or password.")
-            return None
-        
-        
-def create_connection():
-    """
-    Create a connection to the PostgreSQL database.
-    Returns a psycopg2 connection or None if failed.
-    """
-    try:
-        conn = psycopg2.connect(
-            host=POSTGRES_HOST,
-            dbname=POSTGRES_DB,
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            port=POSTGRES_PORT
-        )
-        return conn
-    except Exception as e:
-        print("Failed to connect to database:", e)
-        return None
-    
-
-def get_all_users_scores(conn):
-    """
-    Retrieve all users' scores from the database and return as a dictionary
-    with the username as the key and high_score as the value.
-    """
-    query = "SELECT username, high_score FROM users"
-    scores = {}
-
-    try:
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (username, password))
+            row = cur.fetchone()
+            if row:
+                print("Login successful!")
+                return username
+            else:
+                print("Invalid username or password.")
+                return None
+
+
+def get_user_high_score(db, username):
+    """
+    Get the user's high_score from the database.
+    """
+    query = "SELECT high_score FROM users WHERE username = %s"
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (username,))
+            row = cur.fetchone()
+            if row:
+                return row[0]
+    return 0
+
+def update_user_high_score(db, username, new_score):
+    """
+    Raise the user's high_score to new_score if it is greater, in a single atomic statement.
+    Returns the user's high_score after the update, or None if the user does not exist.
+    """
+    query = """
+    UPDATE users SET high_score = GREATEST(COALESCE(high_score, 0), %s),
+        updated_at = CASE WHEN COALESCE(high_score, 0) < %s THEN now() ELSE updated_at END
+    WHERE username = %s
+    RETURNING high_score
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (new_score, new_score, username))
+            row = cur.fetchone()
+        conn.commit()
+    return row[0] if row else None
+
+
+def update_high_scores(db, scores):
+    """
+    Raise several users' high scores at once. `scores` is a list of (username, score);
+    each user's high_score only goes up. One statement and one commit for the whole batch.
+    """
+    query = """
+    UPDATE users AS u SET high_score = GREATEST(COALESCE(u.high_score, 0), v.score), updated_at = now()
+    FROM (VALUES %s) AS v(username, score)
+    WHERE u.username = v.username AND COALESCE(u.high_score, 0) < v.score
+    """
+    if not scores:
+        return
+    from psycopg2.extras import execute_values  # Deferred: psycopg2 is only loaded once a database is in use
+
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, query, scores)
+        conn.commit()
+
+
+def get_high_scores(db, usernames):
+    """
+    High scores of just the given users, as {username: high_score}.
+    """
+    query = f"SELECT username, {SCORE} FROM users WHERE username = ANY(%s)"
+    if not usernames:
+        return {}
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (list(usernames),))
+            return dict(cur.fetchall())
+
+
+def rank_rows(rows, position, rank):
+    """
+    Attach ranks to leaderboard rows [(username, score)] sorted best first.
+    `position` is the 0-based place of the first row in the whole leaderboard and
+    `rank` its rank. Equal scores share a rank, the next score skips ahead (1, 2, 2, 4).
+    Returns [(rank, username, score)].
+    """
+    ranked = []
+    previous_score = None
+    for i, (username, score) in enumerate(rows):
+        if previous_score is not None and score != previous_score:
+            rank = position + i + 1
+        ranked.append((rank, username, score))
+        previous_score = score
+    return ranked
+
+
+def get_leaderboard_page(db, after=None, limit=LEADERBOARD_PAGE_SIZE):
+    """
+    One page of the leaderboard, ordered by high_score DESC, username.
+    `after` is the (high_score, username) of the last row of the previous page, or None
+    for the first page (keyset pagination: no OFFSET, each page is one index range scan).
+    Returns [(rank, username, high_score)]; an empty list past the end.
+    """
+    if after is None:
+        page_query = f"""
+        SELECT username, {SCORE} FROM users
+        ORDER BY -{SCORE}, username
+        LIMIT %s
+        """
+        params = (limit,)
+    else:
+        page_query = f"""
+        SELECT username, {SCORE} FROM users
+        WHERE {RANK_KEY} > (%s, %s)
+        ORDER BY -{SCORE}, username
+        LIMIT %s
+        """
+        params = (-after[0], after[1], limit)
+
+    # Rows ahead of the first row of the page, and how many of those have a better score
+    position_query = f"""
+    SELECT COUNT(*) FILTER (WHERE -{SCORE} < %s), COUNT(*) FROM users
+    WHERE {RANK_KEY} < (%s, %s)
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(page_query, params)
+            rows = cur.fetchall()
+            if not rows:
+                return []
+            if after is None:
+                return rank_rows(rows, 0, 1)
+            username, score = rows[0]
+            cur.execute(position_query, (-score, -score, username))
+            better, position = cur.fetchone()
+    return rank_rows(rows, position, better + 1)
+
+
+def get_user_rank(db, username):
+    """
+    The user's place on the leaderboard as (rank, high_score), or None if the user does not exist.
+    """
+    query = """
+    SELECT 1 + (SELECT COUNT(*) FROM users AS o WHERE -COALESCE(o.high_score, 0) < -COALESCE(u.high_score, 0)),
+           COALESCE(u.high_score, 0)
+    FROM users AS u WHERE u.username = %s
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (username,))
+            row = cur.fetchone()
+    return tuple(row) if row else None
+
+
+def get_leaderboard_around(db, username, radius):
+    """
+    The user's leaderboard row with up to `radius` rows on each side,
+    as [(rank, username, high_score)], or [] if the user does not exist.
+    """
+    # The rows ahead of the user, nearest first (the index read backwards)
+    ahead_query = f"""
+    SELECT username, {SCORE} FROM users
+    WHERE {RANK_KEY} < (%s, %s)
+    ORDER BY -{SCORE} DESC, username DESC
+    LIMIT %s
+    """
+    window_query = f"""
+    SELECT username, {SCORE} FROM users
+    WHERE {RANK_KEY} >= (%s, %s)
+    ORDER BY -{SCORE}, username
+    LIMIT %s
+    """
+    position_query = f"""
+    SELECT COUNT(*) FILTER (WHERE -{SCORE} < %s), COUNT(*) FROM users
+    WHERE {RANK_KEY} < (%s, %s)
+    """
+    with db.connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(query)
-            results = cur.fetchall()
-            scores = {row[0]: row[1] for row in results}  # Convert to dictionary
+            cur.execute(f"SELECT {SCORE} FROM users WHERE username = %s", (username,))
+            row = cur.fetchone()
+            if row is None:
+                return []
+            cur.execute(ahead_query, (-row[0], username, radius))
+            ahead = cur.fetchall()
+            first_username, first_score = ahead[-1] if ahead else (username, row[0])
+            cur.execute(window_query, (-first_score, first_username, len(ahead) + 1 + radius))
+            rows = cur.fetchall()
+            cur.execute(position_query, (-first_score, -first_score, first_username))
+            better, position = cur.fetchone()
+    return rank_rows(rows, position, better + 1)
+
 
-    except Exception as e:
-        print(f"Error fetching scores: {e}")
+def get_database_time(db):
+    """
+    The database server's current time, e.g. as the watermark for get_scores_changed_since.
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT now()")
+            return cur.fetchone()[0]
 
-    return scores  # Returns a dictionary of {username: high_score}
+
+def get_scores_changed_since(db, since=None):
+    """
+    Users whose score changed after `since` (a datetime; None for everyone),
+    as [(username, high_score, updated_at)].
+    """
+    if since is None:
+        query = f"SELECT username, {SCORE}, updated_at FROM users"
+        params = ()
+    else:
+        query = f"SELECT username, {SCORE}, updated_at FROM users WHERE updated_at > %s"
+        params = (since,)
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchall()
+
+
+def save_replay(db, username, start_level, end_level, frames, data):
+    """
+    Store a recorded game (logic.replay replay bytes). Returns the replay's id.
+    """
+    query = """
+    INSERT INTO replays (username, start_level, end_level, frames, data)
+    VALUES (%s, %s, %s, %s, %s) RETURNING id
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (username, start_level, end_level, frames, data))
+            replay_id = cur.fetchone()[0]
+        conn.commit()
+    return replay_id
+
+
+def get_user_replays(db, username, limit=20):
+    """
+    The user's latest replays, newest first, as [(id, start_level, end_level, frames, created_at)].
+    """
+    query = """
+    SELECT id, start_level, end_level, frames, created_at FROM replays
+    WHERE username = %s ORDER BY created_at DESC, id DESC LIMIT %s
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (username, limit))
+            return cur.fetchall()
+
+
+def get_replay(db, replay_id):
+    """
+    The replay bytes stored under `replay_id`, or None.
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT data FROM replays WHERE id = %s", (replay_id,))
+            row = cur.fetchone()
+    return bytes(row[0]) if row else None
@@ -1,258 +1,73 @@
-import pygame
-import psycopg2
-import sys
 import os
-from logic.ui import LoginApp
-# from logic.leaderboard import ScoreApp
-import socket
-import tkinter as tk
-import math
-import time
-from kivy.clock import Clock
-import multiprocessing
-from pathlib import Path
-from dotenv import load_dotenv
-from kivy.config import Config
-Config.set('kivy', 'log_level', 'info')
-load_dotenv(override=True)
+import sys
+from logic.levelpack import open_level_registry
+
+# Heavy imports (Kivy, pygame, numpy, psycopg2) are deferred to the
+# subsystem that needs them, so the login window shows as early as possible:
+#   Kivy       -> main(), for the login screen and the leaderboard
+#   psycopg2   -> Storage's background connection thread
+#   pygame     -> run_game()
+# `python -m logic.importreport` reports what each startup phase costs to import.
 
 
 # --------------------------------------------------------------------------------
 # Configuration and Global Variables
 # --------------------------------------------------------------------------------
 
-POSTGRES_HOST = os.getenv('POSTGRES_HOST')        # e.g., "localhost" or "remote.server.com"
-POSTGRES_DB = os.getenv('POSTGRES_DB') 
-POSTGRES_USER = os.getenv('POSTGRES_USER') 
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD') 
-POSTGRES_PORT = os.getenv('POSTGRES_PORT') # Default PostgreSQL port is 5432
-
-
-POSTGRES_PASSWORD="lg5EBC4000KYzsS5D5eJ"  
-POSTGRES_USER="nikita"             
-POSTGRES_DB="main_db"  
-POSTGRES_PORT=6000     
-POSTGRES_HOST="185.139.69.220"
-
-
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
+# Screen size, player size and the movement rules live in logic/rules.py,
+# shared with the headless engine (logic/simulation.py).
 FPS = 60
 
 PLAYER_SPEED = 5
-PLAYER_SIZE = 30
-
-# The game has 10 levels. Each level has a unique arrangement of walls.
-# We'll store walls as lists of Rects (x, y, width, height).
-# For simplicity, these are just "example" walls; feel free to customize.
-def get_level_walls(level_num):
-    # A simple function that returns walls for each level.
-    # You can adjust or add more complex designs.
-    # The coordinate system: (0,0) is top-left by default in Pygame.
-    
-    if level_num == 1:
-        return [
-            pygame.Rect(200, 100, 50, 400),
-            pygame.Rect(400, 50, 50, 400),
-            pygame.Rect(600, 150, 50, 400),
-        ]
-    elif level_num == 2:
-        return [
-            pygame.Rect(100, 200, 600, 50),
-            pygame.Rect(200, 400, 400, 50),
-        ]
-    elif level_num == 3:
-        return [
-            pygame.Rect(100, 100, 50, 300),
-            pygame.Rect(300, 200, 50, 300),
-            pygame.Rect(500, 100, 50, 300),
-        ]
-    elif level_num == 4:
-        return [
-            pygame.Rect(150, 150, 500, 50),
-            pygame.Rect(150, 300, 500, 50),
-        ]
-    elif level_num == 5:
-        return [
-        pygame.Rect(50, 50, 500, 40),
-        pygame.Rect(50, 410, 500, 40),
-        pygame.Rect(50, 50, 40, 400),
-        pygame.Rect(510, 50, 40, 400)  # New rectangle added
-        ]
-    elif level_num == 6:
-        return [
-            pygame.Rect(200, 200, 50, 300),
-            pygame.Rect(400, 100, 50, 300),
-            pygame.Rect(600, 250, 50, 300),
-        ]
-    elif level_num == 7:
-        return [
-            pygame.Rect(100, 300, 600, 50),
-            pygame.Rect(200, 100, 50, 200),
-            pygame.Rect(550, 350, 50, 200),
-        ]
-    elif level_num == 8:
-        return [
-            pygame.Rect(100, 100, 600, 50),
-            pygame.Rect(100, 200, 50, 300),
-            pygame.Rect(200, 450, 500, 50),
-            pygame.Rect(700, 250, 50, 200),
-        ]
-    elif level_num == 9:
-        return [
-            pygame.Rect(150, 150, 500, 50),
-            pygame.Rect(150, 150, 50, 300),
-            pygame.Rect(600, 150, 50, 300),
-            pygame.Rect(150, 400, 500, 50),
-        ]
-    elif level_num == 10:
-        return [
-            pygame.Rect(100, 100, 600, 400),
-            pygame.Rect(200, 200, 400, 200),
-        ]
-    else:
-        return []
 
-# --------------------------------------------------------------------------------
-# Database Functions
-# --------------------------------------------------------------------------------
+# Levels come from assets/levels.pack, which is rebuilt from levels/default.json
+# whenever the source is newer (or by hand: `python -m logic.levelpack`).
+try:
+    LEVELS = open_level_registry()
+except ValueError as e:
+    sys.exit(f"Cannot start the game: {e}")
 
-def check_internet_connection(host="8.8.8.8", port=53, timeout=3):
-    """
-    A simple way to check if the local machine has internet access.
-    Tries to open a socket to 8.8.8.8 (Google DNS) on port 53.
-    Returns True if successful, False otherwise.
-    """
-    try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-        return True
-    except socket.error as ex:
-        print("No internet connection:", ex)
-        return False
-
-def create_connection():
-    """
-    Create a connection to the PostgreSQL database.
-    Returns a psycopg2 connection or None if failed.
-    """
-    try:
-        conn = psycopg2.connect(
-            host=POSTGRES_HOST,
-            dbname=POSTGRES_DB,
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            port=POSTGRES_PORT
-        )
-        return conn
-    except Exception as e:
-        print("Failed to connect to database:", e)
-        return None
-
-def create_tables(conn):
-    """
-    Create the 'users' table if it does not exist.
-    """
-    query = """
-    CREATE TABLE IF NOT EXISTS users (
-        id SERIAL PRIMARY KEY,
-        username VARCHAR(255) UNIQUE NOT NULL,
-        password VARCHAR(255) NOT NULL,
-        high_score INTEGER DEFAULT 0
-    )
-    """
-    with conn.cursor() as cur:
-        cur.execute(query)
-    conn.commit()
+# Bake background, walls, exit and label into one surface per level and only
+# repaint the player's old/new rectangles each frame. Set to False to go back
+# to repainting and flipping the full screen every frame.
+DIRTY_RECT_RENDERING = True
 
+# Font sizes of the on-screen text (fonts are loaded once, see logic.render.TextRenderer)
+LABEL_FONT_SIZE = 36
+HUD_FONT_SIZE = 20
 
-def get_user_high_score(conn, username):
-    """
-    Get the user's high_score from the database.
-    """
-    query = "SELECT high_score FROM users WHERE username = %s"
-    with conn.cursor() as cur:
-        cur.execute(query, (username,))
-        row = cur.fetchone()
-        if row:
-            return row[0]
-    return 0
-
-def update_user_high_score(conn, username, new_score):
-    """
-    Update the user's high_score if new_score is greater than current high_score.
-    """
-    current_score = get_user_high_score(conn, username)
-    if new_score > current_score:
-        query = "UPDATE users SET high_score = %s WHERE username = %s"
-        with conn.cursor() as cur:
-            cur.execute(query, (new_score, username))
-        conn.commit()
-
-def get_all_users_scores(conn):
-    """
-    Retrieve all users' scores from the database and return as a dictionary
-    with the username as the key and high_score as the value.
-    """
-    query = "SELECT username, high_score FROM users"
-    scores = {}
+# Frame profiler (logic/profiler.py): FUNCTION_GAME_PROFILE=1 times every phase
+# of the game loop, F3 shows the rolling p50/p95/p99 on screen and a Chrome trace
+# (chrome://tracing or https://ui.perfetto.dev) is written to PROFILE_TRACE_PATH on exit.
+PROFILE = os.getenv("FUNCTION_GAME_PROFILE") == "1"
+PROFILE_TRACE_PATH = os.getenv("FUNCTION_GAME_TRACE", "frame_trace.json")
 
-    try:
-        with conn.cursor() as cur:
-            cur.execute(query)
-            results = cur.fetchall()
-            if results:
-                scores = {row[0]: row[1] for row in results}  # Convert to dictionary
-            else:
-                print("No scores found in the database.")
-    except Exception as e:
-        print(f"Error fetching scores: {e}")
-
-    return scores  # Returns a dictionary of {username: high_score}
+# Record every game as a replay (logic/replay.py) and upload it with the scores
+RECORD_REPLAYS = True
 
 # --------------------------------------------------------------------------------
 # Game Logic
 # --------------------------------------------------------------------------------
-def start_kivy():
-    """
-    Runs leaderboard.py using the bundled Python interpreter inside the PyInstaller environment.
-    """
-    base_dir = Path(sys.executable).parent  # Get directory of main.exe
-    leaderboard_script = base_dir / "_internal" / "logic" / "leaderboard.py"  # Adjust if necessary
-
-    print(f"Starting Kivy application from: {leaderboard_script}")
-
-    try:
-        # Use multiprocessing to start a new process
-        multiprocessing.Process(target=exec_leaderboard, args=(leaderboard_script,)).start()
-    except Exception as e:
-        print(f"Failed to start Kivy application: {e}")
-
-def exec_leaderboard(script_path):
-    """
-    Reads and executes leaderboard.py while setting __file__ manually.
-    """
-    global_vars = {"__name__": "__main__", "__file__": script_path, "sys": sys}  # Set __file__
-    
-    with open(script_path, "r", encoding="utf-8") as f:
-        exec(f.read(), global_vars)
-
-def stop_kivy():
-    global kivy_process
-    if kivy_process and kivy_process.poll() is None:  # Check if it's still running
-        print("Stopping Kivy application...")
-        kivy_process.terminate()  # Graceful termination
-        time.sleep(1)  # Allow time to close properly
-        kivy_process.kill()  # Force kill if still running
-        kivy_process = None
-
-
-def run_game(username, conn):
+def run_game(username, storage):
     """
     Main game loop. The player starts at level 1 or at the user's existing high_score + 1.
     The user can move with the arrow keys or WASD to reach the top-right corner.
-    When a level is completed, if it is the user's highest completed level, we update DB.
+    When a level is completed, if it is the user's highest completed level, we save it
+    (locally at once, and to the DB when it is reachable).
+    Returns True if the player completed every level, False if they closed the game.
     """
+    import pygame
+    from logic.render import TextureCache, TextRenderer, LevelRenderer, LevelTextures
+    from logic.textinput import TextInput, FONT_SIZE
+    from logic.profiler import FrameProfiler, ProfilerHUD
+    from logic.rules import (
+        SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_SIZE, LevelGeometry,
+        hits_wall, clamp_to_screen, push_out, function_step, apply_step, reached_exit,
+    )
+    from logic.expressions import compile_user_function
+    from logic.assetpack import get_assets
+    from logic.replay import ReplayRecorder, encode_replay
+
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("10-Level Wall Maze")
@@ -262,53 +77,99 @@ def run_game(username, conn):
     clock = pygame.time.Clock()
     
     
-    assets_dir = os.path.join(os.path.dirname(__file__), "assets")
+    # Load textures from the pre-decoded asset bundle (logic/assetpack.py),
+    # already cropped/scaled to the size they are drawn at
+    assets = get_assets()
+    background_texture = assets.surface("background")
+    player_texture = assets.surface("player")
+    wall_texture = assets.surface("wall")
+    exit_texture = assets.surface("exit")
+
+    # Fonts and rendered labels, shared by the level label, the text box and the HUD
+    text_renderer = TextRenderer()
+
+    # Box where the player types the next function, drawn over the game
+    text_input = TextInput((SCREEN_WIDTH // 2 - 250, SCREEN_HEIGHT - 70, 500, 50), prompt="f: ",
+                           font=text_renderer.font(FONT_SIZE))
+
+    profiler = FrameProfiler(enabled=PROFILE)
+    profiler_hud = ProfilerHUD(profiler, font=text_renderer.font(HUD_FONT_SIZE))
+
+    def finish_profile():
+        if profiler.enabled:
+            print("\n".join(profiler.summary()))
+            print("Texture cache:", texture_cache.stats())
+            print("Text cache:", text_renderer.stats())
+            events = profiler.export_chrome_trace(PROFILE_TRACE_PATH)
+            print(f"Wrote {events} trace events to {PROFILE_TRACE_PATH}")
+
+    # Scaled wall/exit textures, filled whenever a new level is loaded
+    texture_cache = TextureCache()
+    level_renderer = LevelRenderer(screen, texture_cache,
+                                   LevelTextures(background_texture, wall_texture, exit_texture, player_texture),
+                                   dirty_rects=DIRTY_RECT_RENDERING)
+    loaded_level = None
+
+    # If user has a high_score, that is the last level number they've completed.
+    # Start them on the next level, but do not exceed the last level.
+    # The high score is read once and then kept up to date locally.
+    with profiler.span("db_high_score"):
+        high_score = storage.get_high_score(username)
+    start_level = LEVELS.next_number(high_score)
+
+    if start_level > LEVELS.last_number():
+        start_level = LEVELS.last_number()
 
-    # Load textures
-    background_texture = pygame.image.load(os.path.join(assets_dir, "background.jpg")).convert()
-    player_texture = pygame.image.load(os.path.join(assets_dir, "player.png")).convert_alpha()
-    wall_texture = pygame.image.load(os.path.join(assets_dir, "wall.png")).convert_alpha()
-    exit_texture = pygame.image.load(os.path.join(assets_dir, "exit.jpg")).convert_alpha()
-    
-    # Optionally scale player texture if PLAYER_SIZE is fixed:
-    player_texture = pygame.transform.scale(player_texture, (PLAYER_SIZE, PLAYER_SIZE))
+    current_level = start_level
 
-    # If user has a high_score, that means they've completed that many levels.
-    # Start them on the next level, but do not exceed 10.
-    start_level = get_user_high_score(conn, username) + 1
-    if start_level > 10:
-        start_level = 10
+    # Player starts at the level's spawn point (bottom-left corner by default)
+    player_rect = pygame.Rect(LEVELS.get(current_level).spawn, (PLAYER_SIZE, PLAYER_SIZE))
 
-    current_level = start_level
+    # The session is recorded (start + each function and its frame) so it can be
+    # played back with `python -m logic.replay`; saved and uploaded when the game ends
+    recorder = ReplayRecorder(username, FPS, current_level, player_rect.topleft)
+    frame = 0
+
+    def save_replay():
+        if RECORD_REPLAYS:
+            try:
+                data = encode_replay(recorder.finish(frame, current_level, player_rect.topleft))
+            except ValueError as e:
+                print("Failed to record replay:", e)
+                return
+            storage.save_replay(data)
 
-    # Player starts at bottom-left corner, which we define as:
-    # (0, SCREEN_HEIGHT - PLAYER_SIZE)
-    player_rect = pygame.Rect(0, SCREEN_HEIGHT - PLAYER_SIZE, PLAYER_SIZE, PLAYER_SIZE)
     running = True
     while running:
         clock.tick(FPS)
+        profiler.begin_frame()
 
         # Close the game if all levels are done
-        if current_level > 10:
+        if current_level > LEVELS.last_number():
             print("Congratulations! You've completed all levels!")
             print("Game Over. Closing Pygame...")
 
             pygame.quit()  # Quit Pygame properly
-
-            # Start the Kivy app
-            start_kivy()
-
-            # Simulating some delay before stopping (for testing)
-            time.sleep(30)  # Let Kivy run for 5 seconds before stopping
-            stop_kivy()
-
-            print("Kivy stopped. Exiting program...")
-            sys.exit()
-
-        for event in pygame.event.get():
-            if event.type == 32787: #exit type
-                print("Exit button pressed. Exiting game.")
-                running = False  # Exit the main loop
+            assets.release_surfaces()
+            finish_profile()
+            save_replay()
+            return True
+
+        with profiler.span("events"):
+            for event in pygame.event.get():
+                if event.type == 32787: #exit type
+                    print("Exit button pressed. Exiting game.")
+                    running = False  # Exit the main loop
+                elif profiler.enabled and event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler_hud.toggle()
+                elif text_input.active:
+                    entered = text_input.handle_event(event)
+                    if entered is not None:
+                        text_input.close()
+                        recorder.add_input(frame, entered)
+                        user_function = entered
+                        input_active = False
+                        print("User input received:", user_function)
                 
         dx, dy = 0, 0
         #! KEYBOARD INPUT
@@ -325,27 +186,10 @@ def run_game(username, conn):
         
         #! REDRAW FUNC
         def redraw():
-            screen.blit(background_texture, (0, 0))  # black background
-
-            # Draw walls
-            for wall in walls:
-                wall_tex_scaled = pygame.transform.scale(wall_texture, (wall.width, wall.height))
-                screen.blit(wall_tex_scaled, (wall.x, wall.y))
-
-            # Draw player
-            screen.blit(player_texture, (player_rect.x, player_rect.y))
-            
-            # Draw exit area
-            exit_area_rect = pygame.Rect(SCREEN_WIDTH - 100, 0, 100, 100)
-            exit_tex_scaled = pygame.transform.scale(exit_texture, (exit_area_rect.width, exit_area_rect.height))
-            screen.blit(exit_tex_scaled, (exit_area_rect.x, exit_area_rect.y))
-
-            # Display current level
-            font = pygame.font.SysFont(None, 36)
-            text_surface = font.render(f"Level: {current_level}", True, (255, 255, 255))
-            screen.blit(text_surface, (10, 10))
-
-            pygame.display.flip()
+            # Draws the loaded level: on the frame a level is completed, current_level has
+            # already moved on but its geometry is only loaded at the top of the next frame
+            label_surface = text_renderer.render(f"Level: {loaded_level}", LABEL_FONT_SIZE)
+            level_renderer.redraw(geometry, label_surface, player_rect, (text_input, profiler_hud))
 
         # Save old position in case we collide
         
@@ -355,207 +199,160 @@ def run_game(username, conn):
         player_rect.x += dx
         player_rect.y += dy
         
-        # Get walls for current level
-        walls = get_level_walls(current_level)
+        # Build the current level's rects once, when the level is entered
+        if loaded_level != current_level:
+            with profiler.span("load_level"):
+                geometry = LevelGeometry(LEVELS.get(current_level), pygame.Rect)
+                walls = geometry.walls
+                exit_area_rect = geometry.exit
+                texture_cache.preload(wall_texture, [wall.size for wall in walls])
+                texture_cache.preload(exit_texture, [exit_area_rect.size])
+                loaded_level = current_level
 
         # Collision detection: if collide with any wall, revert movement
         #! COLISION HANDLING
        
-        for wall in walls:
-            if player_rect.colliderect(wall):
+        with profiler.span("collision"):
+            if hits_wall(player_rect, geometry):
                 player_rect.x = old_x
                 player_rect.y = old_y
                 collided = True
-                
-        if player_rect.x < 0 or player_rect.y < 0 or \
-           player_rect.x + PLAYER_SIZE > SCREEN_WIDTH or \
-           player_rect.y + PLAYER_SIZE > SCREEN_HEIGHT:
-           player_rect.x = max(1, min(player_rect.x, SCREEN_WIDTH - PLAYER_SIZE))
-           player_rect.y = max(1, min(player_rect.y, SCREEN_HEIGHT - PLAYER_SIZE))
-           collided = True
-  
-        if collided:
-            user_function = None
-            if player_rect.colliderect(wall):
-                BUFFER_DISTANCE = 2  # Distance to keep from the wall
-                if player_rect.right >= wall.left and player_rect.left <= wall.left:
-                    player_rect.right = wall.left - BUFFER_DISTANCE  # Move player to the left of the wall
-                elif player_rect.left <= wall.right and player_rect.right >= wall.right:
-                    player_rect.left = wall.right + BUFFER_DISTANCE  # Move player to the right of the wall
-                if player_rect.bottom >= wall.top and player_rect.top <= wall.top:
-                    player_rect.bottom = wall.top - BUFFER_DISTANCE  # Move player above the wall
-                elif player_rect.top <= wall.bottom and player_rect.bottom >= wall.bottom:
-                    player_rect.top = wall.bottom + BUFFER_DISTANCE  # Move player below the wall
-            if player_rect.x < 0:
-                player_rect.x = 0 + BUFFER_DISTANCE
-            if player_rect.y < 0:
-                player_rect.y = 0 + BUFFER_DISTANCE
-            if player_rect.x + PLAYER_SIZE > SCREEN_WIDTH:
-                player_rect.x = SCREEN_WIDTH - PLAYER_SIZE - BUFFER_DISTANCE
-            if player_rect.y + PLAYER_SIZE > SCREEN_HEIGHT:
-                player_rect.y = SCREEN_HEIGHT - PLAYER_SIZE - BUFFER_DISTANCE
-            redraw()
-            print("Collision detected! Please input a function to execute:")
-            input_active = True
-                    
-        
-
-            
-        if input_active:
-            def get_user_input():
-                root = tk.Tk()
-                root.title("Input Window")
-
-                # Get screen width and height
-                screen_width = root.winfo_screenwidth()
-                screen_height = root.winfo_screenheight()
-
-                # Window dimensions
-                window_width = 300
-                window_height = 100
-
-                # Calculate position to center the window
-                x_position = (screen_width // 2) - (window_width // 2)
-                y_position = (screen_height // 2) - (window_height // 2)
-
-                # Set window geometry (Width x Height + X_Position + Y_Position)
-                root.geometry(f"{window_width}x{window_height}+{x_position}+{y_position}")
-
-                user_input_var = tk.StringVar()  # StringVar to store input
-
-                def submit_data():
-                    if not user_input_var.get().strip():
-                        print("Error: User input cannot be blank.")
-                        return  # Do not close the window; let the user retry
 
-                    root.quit()  # Quit event loop
-
-                # Entry widget
-                entry = tk.Entry(root, textvariable=user_input_var, width=40)
-                entry.pack(padx=10, pady=10)
+            if clamp_to_screen(player_rect):
+                collided = True
 
-                # Submit button
-                submit_button = tk.Button(root, text="Submit", command=submit_data)
-                entry.bind("<Return>", lambda event: submit_data())
-                submit_button.pack(padx=10, pady=10)
+            if collided:
+                user_function = None
+                push_out(player_rect, geometry)
+                print("Collision detected! Please input a function to execute:")
+                input_active = True
+                collided = False
 
-                root.mainloop()  # Start Tkinter event loop
-                root.destroy()  # Ensure cleanup
+        # Ask for the next function in the in-game box; the loop keeps running while the player types
+        if input_active and not text_input.active:
+            text_input.open()
 
-                return user_input_var.get()  # Return user input after window closes
-            
-            user_function = get_user_input()
-            input_active = False
-            collided = False
-            print("User input received:", user_function)
-
-        
         if user_function:
-            try:
-                if user_function.strip() == "":
-                    input_active = True
-                    raise ValueError("User function cannot be blank.")
-                
-                # Extract the mathematical expression from the user input (e.g., "asc!y=x-5")
-                pack = user_function.split("!")
-                if len(pack) != 2:
-                    input_active = True
-                    raise ValueError("Invalid format. Expected format: <seq_type>!<expression> (e.g., asc!y=x-5).")
-                
-                seq_type = pack[0]
-                math_expression = pack[1].split('=')[1].strip()
-
-                print(seq_type, math_expression)
-                
-                # Prepare the environment for evaluating the math expression
-                safe_globals = {
-                    "math": math,
-                    "cos": math.cos,
-                    "sin": math.sin,
-                    "abs": abs,
-                    "pow": pow
-                }
-                
+            with profiler.span("function"):
                 try:
-                    math_function = eval(f"lambda x: {math_expression}", safe_globals)
-                except Exception as eval_error:
-                    input_active = True
-                    raise ValueError(f"Invalid mathematical expression: {math_expression}. Error: {eval_error}")
+                    if user_function.strip() == "":
+                        user_function = None
+                        input_active = True
+                        raise ValueError("User function cannot be blank.")
                 
-                x_value = 10  
-                if seq_type.lower() == "asc":
-                    player_rect.x += x_value
-                    player_rect.y -= math_function(x_value)
+                    # Parse, validate and compile the user input (e.g., "asc!y=x-5").
+                    # Inputs seen before come straight from the expression cache.
+                    seq_type, math_expression, math_function = compile_user_function(user_function)
 
-                    
-                elif seq_type.lower() == "desc":
-                    player_rect.x -= x_value
-                    player_rect.y -= math_function(x_value)
+                    print(seq_type, math_expression)
 
-                else:
-                    input_active = True
-                    raise ValueError(f"Invalid sequence type: {seq_type}. Expected 'asc' or 'desc'.")
-                    
-                
-                print("user_func", player_rect.x, player_rect.y)
+                    step_x, step_y = function_step(seq_type, math_function)
+                    impact = apply_step(player_rect, step_x, step_y, geometry)
+                    if impact is not None:
+                        collided = True
+                        print(f"Function path hit wall {impact.wall_index} at t={impact.time:.2f}")
 
-            except ValueError as ve:
-                print("Value Error:", ve)
-                input_active = True
-            except Exception as e:
-                print("Unexpected Error:", e)
-                input_active = True
+                    print("user_func", player_rect.x, player_rect.y)
 
-        # Check if player reached top-right corner region:
-        # Let's define "reached top-right corner" as x > SCREEN_WIDTH - 100 and y < 100
-        if player_rect.x > SCREEN_WIDTH - 100 and player_rect.y < 100:
+                except ValueError as ve:
+                    print("Value Error:", ve)
+                    user_function = None
+                    input_active = True
+                except Exception as e:
+                    print("Unexpected Error:", e)
+                    user_function = None
+                    input_active = True
+
+        # Check if player reached the level's exit region (top-right corner by default)
+        if reached_exit(player_rect, exit_area_rect):
             print(f"Level {current_level} Complete!")
             collided = False
             user_function = None
             
-            # Update the user's high_score in DB if this is the highest level they've reached
-            if current_level > get_user_high_score(conn, username):
-                update_user_high_score(conn, username, current_level)
-            current_level += 1
+            # Save the user's high_score if this is the highest level they've reached.
+            # The DB write happens on a background thread so a slow database never stalls a frame.
+            if current_level > high_score:
+                with profiler.span("db_record_score"):
+                    storage.record_high_score(username, current_level)
+                high_score = current_level
+            current_level = LEVELS.next_number(current_level)
             # Reset player position for next level
-            player_rect.x = 0
-            player_rect.y = SCREEN_HEIGHT - PLAYER_SIZE
+            if current_level in LEVELS:
+                player_rect.topleft = LEVELS.get(current_level).spawn
             collided = True
             input_active = True
 
         # Draw everything
-        redraw()
+        with profiler.span("redraw"):
+            redraw()
+        profiler.end_frame()
+        frame += 1
     pygame.quit()
+    assets.release_surfaces()
+    finish_profile()
+    save_replay()
+    return False
+
+def configure_kivy(hidden=False):
+    """
+    Kivy settings that must be applied before any Kivy window or widget is imported.
+    With `hidden`, the window is created hidden until Window.show() is called.
+    """
+    from kivy.config import Config
+    Config.set('kivy', 'log_level', 'info')
+    if hidden:
+        Config.set('graphics', 'window_state', 'hidden')
+
+
+def run_leaderboard(connection, username):
+    """
+    Leaderboard process (see logic/leaderboard_process.py). Kivy is imported and its
+    window created, hidden, while the game runs; the leaderboard is shown as soon
+    as the game hands over its scores.
+    """
+    configure_kivy(hidden=True)
+    from logic.leaderboard import show_leaderboard
+    from logic.leaderboard_process import wait_for_show
+
+    scores = wait_for_show(connection)
+    if scores is not None:
+        show_leaderboard(scores, username)
+        scores.close()
+    connection.close()
+
 
 def main():
-    # Проверка интернет соединения
-    if check_internet_connection():
-        print("Internet connection detected.")
-        conn = create_connection()
-        if conn:
-            create_tables(conn)
-            x = LoginApp(conn=conn)
-            x.run()
-            if x.username:
-                x.terminate()
-                run_game(x.username, conn)
-            else:
-                print("Невозможно авторизовать пользователя. Выход.")
-            conn.close()
+    configure_kivy()
+    from logic.storage import Storage
+    from logic.ui import LoginApp
+    from logic.leaderboard_process import LeaderboardProcess
+
+    # The database is connected in the background; without it the game runs
+    # offline on the local mirror and syncs scores once the server is back.
+    storage = Storage()
+    storage.connect_in_background()
+    try:
+        x = LoginApp(storage=storage)
+        x.run()
+        if x.username:
+            x.terminate()
+            # Started now so Kivy loads and the scores are read while the player plays
+            leaderboard = LeaderboardProcess(run_leaderboard, x.username)
+            leaderboard.start(storage)
+            try:
+                if run_game(x.username, storage):
+                    storage.flush()  # Write queued scores before the leaderboard reads them
+                    leaderboard.show(storage)
+            finally:
+                leaderboard.close()
         else:
-            print("Невозможно подключится к базе данных. Выход.")
-    else:
-        print("Нет интернет соединения. Невозможно авторизоваться или зарегистрировать пользователя.")
-        print("Игра требует подклюбчения к базе данных.")
-    
+            print("Невозможно авторизовать пользователя. Выход.")
+    finally:
+        storage.close()
+
 
-# def show_leaderboard(conn):
-#     """Run ScoreApp to display leaderboard safely after game ends."""
-#     print("Displaying leaderboard...")
-#     leaderboard = ScoreApp(conn, get_all_users_scores(conn))
-#     leaderboard.run()
-#     leaderboard.terminate()
-    
 if __name__ == "__main__":
-    multiprocessing.freeze_support()
+    import multiprocessing
+
+    multiprocessing.freeze_support()  # The leaderboard process, in the PyInstaller build
     main()
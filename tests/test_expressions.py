@@ -0,0 +1,138 @@
+import math
+import time
+import unittest
+
+from logic.expressions import (
+    MAX_INT_BITS, safe_pow, compile_expression, compile_user_function,
+    _compile_expression, _compile_user_function,
+)
+from logic.trajectory import compile_vectorized
+
+# -----------------------------
+# Expression Whitelist
+# -----------------------------
+# logic.expressions is the only thing between player (and grader) input and
+# eval(), so these pin down what it must refuse and what it must keep allowing.
+
+
+class RejectedExpressionTests(unittest.TestCase):
+    def assertRejected(self, expression):
+        with self.assertRaises(ValueError, msg=expression):
+            compile_expression(expression)
+
+    def test_unknown_names(self):
+        for expression in ("y", "__import__('os')", "open", "eval('1')", "globals()", "__builtins__", "exec"):
+            self.assertRejected(expression)
+
+    def test_attributes(self):
+        for expression in ("x.real", "(1).__class__", "math.__dict__", "math.__loader__",
+                           "math.sin.__self__", "abs.__self__", "pow.__globals__"):
+            self.assertRejected(expression)
+
+    def test_keywords(self):
+        for expression in ("abs(x=1)", "pow(x, 2, mod=3)", "math.log(x, base=2)"):
+            self.assertRejected(expression)
+
+    def test_non_numeric_constants(self):
+        for expression in ("'a' * 9", "b'x'", "True + x", "None", "x + False", "..."):
+            self.assertRejected(expression)
+
+    def test_other_syntax(self):
+        for expression in ("lambda: 1", "[x for x in ()]", "(x, x)", "x[0]", "x < 1", "x if x else 1",
+                           "(y := 1)", "{}", "f'{x}'"):
+            self.assertRejected(expression)
+
+    def test_banned_math_functions(self):
+        for name in ("factorial", "comb", "perm", "prod", "isqrt", "gcd", "lcm"):
+            self.assertRejected(f"math.{name}(x)")
+
+    def test_banned_math_functions_in_vector_engine(self):
+        for expression in ("math.factorial(x)", "math.comb(x, 2)", "x.real"):
+            with self.assertRaises(ValueError, msg=expression):
+                compile_vectorized(expression)
+
+    def test_bad_user_input_format(self):
+        for text in ("x*2", "up!y=x", "asc!x*2", "asc!y=", "asc!y=x!2", "asc!y=x=2"):
+            with self.assertRaises(ValueError, msg=text):
+                compile_user_function(text)
+
+
+class PowerBoundTests(unittest.TestCase):
+    def assertRefusedQuickly(self, function, x=1):
+        start = time.perf_counter()
+        with self.assertRaises(ValueError):
+            function(x)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_power_tower(self):
+        self.assertRefusedQuickly(compile_expression("9**9**9"))
+
+    def test_pow_call(self):
+        self.assertRefusedQuickly(compile_expression("pow(9, 10**6)"))
+        self.assertRefusedQuickly(compile_expression("pow(-9, 10**6)"))
+        self.assertRefusedQuickly(compile_expression("x ** 10**7"), x=3)
+
+    def test_math_pow_stays_float(self):
+        with self.assertRaises(OverflowError):
+            compile_expression("math.pow(9, 10**6)")(1)
+
+    def test_bound(self):
+        # The estimate is exponent * base.bit_length(), and (2).bit_length() == 2
+        exponent = MAX_INT_BITS // 2
+        self.assertEqual(safe_pow(2, exponent), 2 ** exponent)
+        with self.assertRaises(ValueError):
+            safe_pow(2, exponent + 1)
+
+    def test_ordinary_powers(self):
+        self.assertEqual(compile_expression("x**2")(3), 9)
+        self.assertEqual(compile_expression("pow(x, 3)")(2), 8)
+        self.assertEqual(compile_expression("pow(2, 10, 1000)")(0), 24)
+        self.assertEqual(compile_expression("2**-1")(0), 0.5)
+        self.assertEqual(compile_expression("(-1)**(10**9)")(0), 1)
+        self.assertEqual(compile_expression("0**(10**9)")(0), 0)
+
+
+class AllowedExpressionTests(unittest.TestCase):
+    def test_readme_examples(self):
+        cases = {"x": 4, "-x": -4, "x*3": 12, "x//3": 1, "-x//3": -2, "x*0": 0, "x % 3": 1, "+x - 5": -1}
+        for expression, expected in cases.items():
+            self.assertEqual(compile_expression(expression)(4), expected, expression)
+
+    def test_math_helpers(self):
+        self.assertAlmostEqual(compile_expression("math.sin(x) * 40")(math.pi / 2), 40)
+        self.assertAlmostEqual(compile_expression("cos(x) + abs(-x) + math.pi")(0), 1 + math.pi)
+        self.assertAlmostEqual(compile_expression("math.hypot(x, 4)")(3), 5)
+
+    def test_user_function(self):
+        seq_type, expression, function = compile_user_function("DESC ! y = x*2")
+        self.assertEqual((seq_type, expression, function(5)), ("desc", "x*2", 10))
+
+
+class CacheTests(unittest.TestCase):
+    def setUp(self):
+        _compile_expression.cache_clear()
+        _compile_user_function.cache_clear()
+
+    def test_normalized_user_input_hits(self):
+        first = compile_user_function("asc!y=x*2")
+        again = compile_user_function("  asc!y=x*2\t")
+        self.assertIs(first, again)
+        info = _compile_user_function.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_normalized_expression_hits(self):
+        first = compile_expression("x *  2")
+        again = compile_expression(" x * 2 ")
+        self.assertIs(first, again)
+        info = _compile_expression.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                compile_expression("math.factorial(x)")
+        self.assertEqual(_compile_expression.cache_info().currsize, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import math
+import unittest
+
+import numpy as np
+
+from logic.expressions import ALLOWED_MATH_ATTRIBUTES, compile_expression
+from logic.trajectory import MATH_UFUNCS, VECTOR_GLOBALS, evaluate_curve
+
+
+class VectorMathTests(unittest.TestCase):
+    def test_every_allowed_function_has_a_ufunc(self):
+        functions = {name for name in ALLOWED_MATH_ATTRIBUTES if callable(getattr(math, name))}
+        self.assertEqual(functions, set(MATH_UFUNCS))
+
+    def test_constants(self):
+        vector_math = VECTOR_GLOBALS["math"]
+        for name in ("pi", "e", "tau"):
+            self.assertEqual(getattr(vector_math, name), getattr(math, name))
+
+    def test_no_scalar_fallback(self):
+        with self.assertRaises(AttributeError):
+            VECTOR_GLOBALS["math"].factorial
+
+    def test_matches_scalar_engine(self):
+        xs = np.arange(1, 50, dtype=np.float64)
+        for expression in ("math.sin(x) * 40", "math.log(x) + math.sqrt(x)", "x**2 // 7", "pow(x, -1)",
+                           "math.atan2(x, 3) + math.hypot(x, 4)", "math.fmod(x, 3) - math.pi"):
+            function = compile_expression(expression)
+            expected = [function(x) for x in xs]
+            np.testing.assert_allclose(evaluate_curve(expression, xs), expected, err_msg=expression)
+
+
+if __name__ == '__main__':
+    unittest.main()